@@ -0,0 +1,75 @@
+from centralized_API_backend.chapter_parser import chapter_sort_key, latest_chapter
+
+'''
+    Chapters of every book, one row per chapter (book_chapters table).
+
+    all_books.chapters holds the same data as one JSON document per book, which has to be rewritten in
+    full whenever a chapter is added. book_chapters only gets the rows that changed, and each row carries a
+    numeric sort key, so the latest chapter is a single index lookup on
+    (book_title, book_novel_source, sort_key).
+
+    all_books also carries a summary of its chapters (newest_chapter_link, newest_chapter_sort_key and
+    chapter_count), computed by the scrapers when they write the book, so the read endpoints never need
+    to load the chapters document.
+
+    The schema is created by `python manage.py backfill_book_chapters`, once, before the API or the scrapers
+    use it: adding the columns locks all_books, so it is never done on the scrapers' write path.
+'''
+
+CREATE_BOOK_CHAPTERS_SQL = """
+    CREATE TABLE IF NOT EXISTS book_chapters (
+        id BIGSERIAL PRIMARY KEY,
+        book_title VARCHAR(255) NOT NULL,
+        book_novel_source VARCHAR(100) NOT NULL,
+        chapter TEXT NOT NULL,
+        link TEXT,
+        sort_key NUMERIC,
+        first_seen TIMESTAMP NOT NULL DEFAULT NOW(),
+        UNIQUE (book_title, book_novel_source, chapter),
+        FOREIGN KEY (book_title, book_novel_source)
+            REFERENCES all_books (title, novel_source) ON DELETE CASCADE ON UPDATE CASCADE
+    );
+    CREATE INDEX IF NOT EXISTS book_chapters_book_sort_key ON book_chapters (book_title, book_novel_source, sort_key);
+"""
+
+ADD_CHAPTER_SUMMARY_COLUMNS_SQL = """
+    ALTER TABLE all_books
+        ADD COLUMN IF NOT EXISTS newest_chapter_link TEXT,
+        ADD COLUMN IF NOT EXISTS newest_chapter_sort_key NUMERIC,
+        ADD COLUMN IF NOT EXISTS chapter_count INTEGER;
+"""
+
+def create_chapter_schema(cursor):
+    """
+    Creates the book_chapters table and the chapter summary columns of all_books if they do not exist yet.
+    """
+    cursor.execute(CREATE_BOOK_CHAPTERS_SQL)
+    cursor.execute(ADD_CHAPTER_SUMMARY_COLUMNS_SQL)
+
+def summarize_chapters(chapters):
+    """
+    Computes the chapter summary stored on all_books.
+
+    Args:
+        chapters (dict): Chapter label to chapter link.
+
+    Returns:
+        tuple: (newest chapter link, newest chapter sort key, chapter count). The link and sort key are
+               None if no chapter has a number. On ties, the first chapter in the dict wins.
+    """
+    newest = latest_chapter(chapters)
+    if newest is None:
+        return None, None, len(chapters)
+    return chapters[newest], chapter_sort_key(newest), len(chapters)
+
+def get_latest_chapter(cursor, title, novel_source):
+    """
+    Returns the (chapter, link) with the highest sort key, or None if the book has no numbered chapters.
+    """
+    cursor.execute("""
+        SELECT chapter, link FROM book_chapters
+        WHERE book_title = %s AND book_novel_source = %s AND sort_key IS NOT NULL
+        ORDER BY sort_key DESC, chapter DESC
+        LIMIT 1
+    """, [title, novel_source])
+    return cursor.fetchone()
@@ -0,0 +1,136 @@
+import re
+from collections import namedtuple
+from decimal import Decimal
+from functools import lru_cache
+
+'''
+    The one place that decides how chapters are ordered.
+
+    Chapter labels come in many shapes depending on the source: 'Chapter 12', 'Ch. 12.5', 'Episode 40',
+    'Vol. 3 Chapter 21', 'Chapter 100 - Part 2', '12 - The Return'... Each label is parsed once into a
+    ChapterKey(volume, chapter, part), which compares the way a reader expects: by volume, then chapter
+    (decimals included), then part. Labels without a number sort after every numbered chapter.
+
+    Parsed keys are memoized, since the same labels are compared over and over (sorting, finding the
+    newest chapter, the scrapers' writes).
+'''
+
+ChapterKey = namedtuple('ChapterKey', ['volume', 'chapter', 'part'])
+
+# Sort position of a label without any chapter number: after every numbered chapter
+UNNUMBERED = ChapterKey(float('inf'), float('inf'), float('inf'))
+
+NUMBER = r'\d+(?:\.\d+)?'
+# Every marker and bare number of a label in one left-to-right pass: findall gives one
+# (volume, chapter, part, number) tuple per token, with only the group that matched filled in
+TOKEN_PATTERN = re.compile(
+    r'\b(?:vol(?:ume)?\.?\s*(' + NUMBER + r')'
+    r'|(?:ch(?:ap(?:ter)?)?|ep(?:isode)?)\.?\s*(' + NUMBER + r')'
+    r'|(?:part|pt)\.?\s*(' + NUMBER + r'))'
+    r'|(' + NUMBER + r')',
+    re.IGNORECASE,
+)
+
+# Scale of the parts of a ChapterKey packed into a single number (see chapter_sort_key)
+VOLUME_SCALE = Decimal(1000000)
+PART_SCALE = Decimal('0.001')
+# Highest part that still fits below the next chapter number; higher parts share its sort key
+MAX_PART = 999
+
+@lru_cache(maxsize=65536)
+def parse_chapter(label):
+    """
+    Parses a chapter label into a comparable key.
+
+    Args:
+        label (str): The chapter label, e.g. 'Vol. 2 Chapter 14.5 (Part 2)'.
+
+    Returns:
+        ChapterKey: (volume, chapter, part). Volume and part are 0 when the label does not have them.
+                    UNNUMBERED if the label has no chapter number at all.
+    """
+    if not label:
+        return UNNUMBERED
+
+    volume = chapter = part = number = None
+    for volume_token, chapter_token, part_token, number_token in TOKEN_PATTERN.findall(label):
+        if chapter_token:
+            chapter = chapter or chapter_token
+        elif volume_token and volume is None:
+            volume = volume_token
+        elif part_token and part is None:
+            # Parts are whole numbers: 'Part 3.5' is part 3, and 3.5 is still a chapter number candidate
+            part, _, decimals = part_token.partition('.')
+            if decimals and number is None:
+                number = part_token
+        elif number is None:
+            # A bare number, or a repeated volume or part, is the chapter of labels without a 'Chapter' marker
+            number = volume_token or part_token or number_token
+
+    # No 'Chapter' marker ('12 - The Return', '#12'): the first number that is not the volume or the part
+    chapter = chapter or number
+    if chapter is None:
+        return UNNUMBERED
+
+    return ChapterKey(
+        float(volume) if volume else 0.0,
+        float(chapter),
+        float(part) if part else 0.0,
+    )
+
+def chapter_number(label):
+    """
+    Returns the chapter number of a label (12.5 for 'Chapter 12.5'), or None if it has no number.
+    """
+    key = parse_chapter(label)
+    return None if key is UNNUMBERED else key.chapter
+
+def chapter_sort_key(label):
+    """
+    Packs the chapter key into one number, for the sort_key columns of the database:
+    volume * 1,000,000 + chapter + part * 0.001, with part capped at MAX_PART so it never spills into the
+    chapter number ('Chapter 10 Part 1000' stays below 'Chapter 11').
+
+    Returns:
+        Decimal: The sort key, or None if the label has no chapter number.
+    """
+    key = parse_chapter(label)
+    if key is UNNUMBERED:
+        return None
+    return (
+        Decimal(str(key.volume)) * VOLUME_SCALE
+        + Decimal(str(key.chapter))
+        + Decimal(str(min(key.part, MAX_PART))) * PART_SCALE
+    )
+
+def sort_chapters(chapters, reverse=False):
+    """
+    Sorts a whole chapter dict, parsing every label once.
+
+    Args:
+        chapters (dict): Chapter label to chapter link.
+        reverse (bool): Newest chapter first.
+
+    Returns:
+        dict: The same chapters in reading order, or newest first. Either way, unnumbered labels come last and
+              labels with the same key keep their original order.
+    """
+    numbered, unnumbered = [], []
+    for label in chapters:
+        key = parse_chapter(label)
+        (unnumbered if key is UNNUMBERED else numbered).append((key, label))
+    # sorted() is stable in both directions, so ties keep their original order
+    numbered.sort(key=lambda item: item[0], reverse=reverse)
+    return {label: chapters[label] for _, label in numbered + unnumbered}
+
+def latest_chapter(chapters):
+    """
+    Returns the label of the newest numbered chapter, or None if no chapter has a number.
+    On ties, the first label in the dict wins.
+    """
+    latest_label, latest_key = None, None
+    for label in chapters:
+        key = parse_chapter(label)
+        if key is not UNNUMBERED and (latest_key is None or key > latest_key):
+            latest_label, latest_key = label, key
+    return latest_label
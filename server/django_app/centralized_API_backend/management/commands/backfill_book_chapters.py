@@ -0,0 +1,65 @@
+import json
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from centralized_API_backend.book_chapters import create_chapter_schema, summarize_chapters
+from centralized_API_backend.chapter_parser import chapter_sort_key
+from centralized_API_backend.management.commands.utils.book_writer import copy_rows
+
+class Command(BaseCommand):
+    help = 'Create the book_chapters table and the chapter summary columns of all_books, and fill them from the chapters stored in all_books'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200, help='Number of books copied per transaction')
+
+    def handle(self, *args, **kwargs):
+        batch_size = kwargs['batch_size']
+
+        with connection.cursor() as cursor:
+            create_chapter_schema(cursor)
+            cursor.execute("SELECT title, novel_source FROM all_books ORDER BY novel_source, title")
+            books = cursor.fetchall()
+
+        self.stdout.write(f"Backfilling the chapters of {len(books)} books")
+        inserted = 0
+        for start in range(0, len(books), batch_size):
+            batch = books[start:start + batch_size]
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute("""
+                    SELECT title, novel_source, chapters FROM all_books
+                    WHERE (title, novel_source) IN (SELECT UNNEST(%s::varchar[]), UNNEST(%s::varchar[]))
+                """, [[title for title, _ in batch], [novel_source for _, novel_source in batch]])
+
+                rows, summaries = [], []
+                for title, novel_source, chapters in cursor.fetchall():
+                    if isinstance(chapters, str):
+                        chapters = json.loads(chapters)
+                    chapters = chapters or {}
+                    summaries.append((title, novel_source, *summarize_chapters(chapters)))
+                    for chapter, link in chapters.items():
+                        rows.append((title, novel_source, chapter, link, chapter_sort_key(chapter)))
+
+                cursor.execute("CREATE TEMP TABLE staging_chapters (title VARCHAR(255), novel_source VARCHAR(100), chapter TEXT, link TEXT, sort_key NUMERIC) ON COMMIT DROP")
+                copy_rows(cursor, 'staging_chapters', ['title', 'novel_source', 'chapter', 'link', 'sort_key'], rows)
+                cursor.execute("""
+                    INSERT INTO book_chapters (book_title, book_novel_source, chapter, link, sort_key)
+                    SELECT title, novel_source, chapter, link, sort_key FROM staging_chapters
+                    ON CONFLICT (book_title, book_novel_source, chapter)
+                    DO UPDATE SET sort_key = EXCLUDED.sort_key
+                    WHERE book_chapters.sort_key IS DISTINCT FROM EXCLUDED.sort_key
+                """)
+                inserted += cursor.rowcount
+
+                cursor.execute("CREATE TEMP TABLE staging_summaries (title VARCHAR(255), novel_source VARCHAR(100), newest_chapter_link TEXT, newest_chapter_sort_key NUMERIC, chapter_count INTEGER) ON COMMIT DROP")
+                copy_rows(cursor, 'staging_summaries', ['title', 'novel_source', 'newest_chapter_link', 'newest_chapter_sort_key', 'chapter_count'], summaries)
+                cursor.execute("""
+                    UPDATE all_books ab
+                    SET newest_chapter_link = ss.newest_chapter_link,
+                        newest_chapter_sort_key = ss.newest_chapter_sort_key,
+                        chapter_count = ss.chapter_count
+                    FROM staging_summaries ss
+                    WHERE ab.title = ss.title AND ab.novel_source = ss.novel_source
+                """)
+
+            self.stdout.write(f"{min(start + batch_size, len(books))}/{len(books)} books done")
+
+        self.stdout.write(self.style.SUCCESS(f"Wrote {inserted} chapters to book_chapters"))
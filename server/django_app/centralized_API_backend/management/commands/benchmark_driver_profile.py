@@ -0,0 +1,54 @@
+import time
+from django.core.management.base import BaseCommand
+from centralized_API_backend.management.commands.utils.driver_pool import DriverPool, execute_cdp
+
+DEFAULT_URLS = [
+    'https://kalango.org/manga/',
+    'https://mangasushi.org/manga/',
+    'https://boxnovel.com/novel/',
+]
+
+# Resources the page downloaded (the navigation itself included) and their size on the wire
+TRANSFER_SCRIPT = """
+    const entries = performance.getEntriesByType('navigation').concat(performance.getEntriesByType('resource'));
+    return [entries.length, entries.reduce((total, entry) => total + (entry.transferSize || 0), 0)];
+"""
+
+class Command(BaseCommand):
+    help = "Compare page loads of DriverPool's lightweight browser profile against the full one"
+
+    def add_arguments(self, parser):
+        parser.add_argument('urls', nargs='*', default=DEFAULT_URLS, help='Pages to load')
+        parser.add_argument('--repeat', type=int, default=3, help='Number of loads per page and profile')
+
+    def handle(self, *args, **kwargs):
+        urls, repeat = kwargs['urls'], kwargs['repeat']
+        for name, block_resources in (('full', False), ('lightweight', True)):
+            pool = DriverPool(size=1, block_resources=block_resources)
+            driver = pool.get_driver()
+            try:
+                execute_cdp(driver, 'Performance.enable', {})
+                load_times, resources, transferred, heap = [], [], [], []
+                for url in urls:
+                    for _ in range(repeat):
+                        driver.get('about:blank')
+                        started = time.monotonic()
+                        driver.get(url)
+                        load_times.append(time.monotonic() - started)
+
+                        count, size = driver.execute_script(TRANSFER_SCRIPT)
+                        resources.append(count)
+                        transferred.append(size)
+                        metrics = {metric['name']: metric['value'] for metric in execute_cdp(driver, 'Performance.getMetrics', {})['metrics']}
+                        heap.append(metrics.get('JSHeapUsedSize', 0))
+
+                loads = len(load_times)
+                self.stdout.write(
+                    f"{name:<12} load {sum(load_times) / loads * 1000:8.0f} ms"
+                    f"  requests {sum(resources) / loads:6.1f}"
+                    f"  transferred {sum(transferred) / loads / 1024:8.0f} KB"
+                    f"  JS heap {sum(heap) / loads / 1024 / 1024:6.1f} MB"
+                )
+            finally:
+                pool.release_driver(driver)
+                pool.close_all_drivers()
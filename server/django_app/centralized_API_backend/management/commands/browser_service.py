@@ -0,0 +1,58 @@
+import shutil
+import tempfile
+import subprocess
+from django.core.management.base import BaseCommand, CommandError
+from centralized_API_backend.management.commands.utils.chromedriver import (
+    resolve_chromedriver, chrome_binaries, DEFAULT_SERVICE_PORT, DEFAULT_DEBUGGING_PORT, BROWSER_SERVICE_ENV, BROWSER_DEBUGGERS_ENV,
+)
+from centralized_API_backend.management.commands.utils.driver_pool import CHROME_ARGUMENTS, LIGHTWEIGHT_CHROME_ARGUMENTS
+
+class Command(BaseCommand):
+    help = "Run a long-lived ChromeDriver server, and headless browsers started ahead of time, that the scrapers' driver pools attach to"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--port', type=int, default=DEFAULT_SERVICE_PORT, help='Port the server listens on')
+        parser.add_argument('--allowed-ips', default='', help='Comma-separated remote IPs allowed to connect (default: local only)')
+        parser.add_argument('--browsers', type=int, default=4, help='Headless browsers to start ahead of time (sessions beyond them launch their own)')
+        parser.add_argument('--debugging-port', type=int, default=DEFAULT_DEBUGGING_PORT, help='DevTools port of the first browser, the next ones use the following ports')
+
+    def handle(self, *args, **kwargs):
+        port = kwargs['port']
+        command = [resolve_chromedriver(), f'--port={port}']
+        if kwargs['allowed_ips']:
+            command.append(f"--allowed-ips={kwargs['allowed_ips']}")
+
+        chrome = next(chrome_binaries(), None)
+        if kwargs['browsers'] > 0 and chrome is None:
+            raise CommandError("No Chrome binary found to start the browsers with (use --browsers 0 to only run ChromeDriver)")
+
+        processes, profiles, debugger_addresses = [], [], []
+        try:
+            for index in range(kwargs['browsers']):
+                debugging_port = kwargs['debugging_port'] + index
+                # Every browser needs its own profile directory, or Chrome hands the launch over to the first one
+                profile = tempfile.mkdtemp(prefix='scraper-chrome-')
+                profiles.append(profile)
+                processes.append(subprocess.Popen(
+                    [chrome, *CHROME_ARGUMENTS, *LIGHTWEIGHT_CHROME_ARGUMENTS, f'--remote-debugging-port={debugging_port}',
+                     f'--user-data-dir={profile}', 'about:blank'],
+                    stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                ))
+                debugger_addresses.append(f'127.0.0.1:{debugging_port}')
+
+            server = subprocess.Popen(command)
+            processes.append(server)
+            environment = f"{BROWSER_SERVICE_ENV}=http://localhost:{port}"
+            if debugger_addresses:
+                environment += f" {BROWSER_DEBUGGERS_ENV}={','.join(debugger_addresses)}"
+            self.stdout.write(f"Browser service listening on port {port} with {len(debugger_addresses)} browsers. Run the scrapers with {environment}")
+            server.wait()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            for process in processes:
+                process.terminate()
+            for process in processes:
+                process.wait()
+            for profile in profiles:
+                shutil.rmtree(profile, ignore_errors=True)
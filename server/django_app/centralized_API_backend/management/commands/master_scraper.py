@@ -8,15 +8,26 @@ import datetime
 import subprocess
 import os
 import logging
+import traceback
 from logging.handlers import RotatingFileHandler
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
 from dotenv import load_dotenv
+from centralized_API_backend.management.commands.utils.concurrency import WORKER_BUDGET_ENV
+from centralized_API_backend.management.commands.utils.scraper_registry import load_scrapers
 
 load_dotenv()  # Load environment variables from .env file
 
 class Command(BaseCommand):
     help = 'Runs all scraping scripts and updates the database.'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--parallel', action='store_true', help='Run independent sources at the same time instead of one after another.')
+        parser.add_argument('--max-processes', type=int, default=8, help='Maximum number of scraper processes running at once (only used with --parallel).')
+        parser.add_argument('--max-requests', type=int, default=24, help='Global budget of in-flight requests, split between the running scrapers (only used with --parallel).')
+        parser.add_argument('--in-process', action='store_true', help='Import every scraper once and run them inside this process instead of starting one Python process per script.')
+
     def handle(self, *args, **kwargs):
         """
         Handles the command execution for scraping light novels.
@@ -102,26 +113,132 @@ class Command(BaseCommand):
         django_settings_module = "django_app.settings"
         project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../'))
 
+        env = {**os.environ, "DJANGO_SETTINGS_MODULE": django_settings_module, "PYTHONPATH": project_root}
         total_time = datetime.datetime.now()
 
-        # Iterate over each runnable script and call it
-        for script in all_runnable_scripts:
-            script_path = os.path.join(scripts_folder, script)
-            try:
-                logger.info(f"Starting to scrape {script}")
-                result = subprocess.run(
-                    ["python", script_path],
-                    check=True,
-                    capture_output=True,
-                    text=True,
-                    env={**os.environ, "DJANGO_SETTINGS_MODULE": django_settings_module, "PYTHONPATH": project_root}
-                )
-                logger.info(f"Output of {script}:\n{result.stderr.strip()}")
-            except subprocess.CalledProcessError as e:
-                logger.error(f"Error occurred while running {script}:\n{e.stderr.strip()}")
+        max_processes = 1
+        if kwargs.get('parallel'):
+            max_processes = max(1, kwargs.get('max_processes') or 1)
+            max_requests = max(1, kwargs.get('max_requests') or max_processes)
+
+            # Every source lives on a different host, so the only thing we need to protect is our own machine.
+            # Each running scraper gets an equal share of the global request budget.
+            env[WORKER_BUDGET_ENV] = str(max(1, max_requests // max_processes))
+            logger.info(f"Running in parallel with up to {max_processes} processes and {max_requests} in-flight requests ({env[WORKER_BUDGET_ENV]} per source)")
+
+        if kwargs.get('in_process'):
+            if WORKER_BUDGET_ENV in env:
+                os.environ[WORKER_BUDGET_ENV] = env[WORKER_BUDGET_ENV]
+            self.run_in_process(scripts_folder, all_runnable_scripts, max_processes, logger)
+        elif kwargs.get('parallel'):
+            with ThreadPoolExecutor(max_workers=max_processes) as executor:
+                futures = [executor.submit(self.run_script, scripts_folder, script, env, logger) for script in all_runnable_scripts]
+                for future in as_completed(futures):
+                    script, succeeded, output, duration = future.result()
+                    self.log_script_result(logger, script, succeeded, output, duration)
+        else:
+            # Iterate over each runnable script and call it
+            for script in all_runnable_scripts:
+                script, succeeded, output, duration = self.run_script(scripts_folder, script, env, logger)
+                self.log_script_result(logger, script, succeeded, output, duration)
 
         logger.info(f"All runnable scripts executed in {self.format_duration(datetime.datetime.now() - total_time)}.")
     
+    def run_in_process(self, scripts_folder, scripts, max_workers, logger):
+        """
+        Imports every scraper once and runs them inside this process.
+
+        All scrapers share this process's Django setup and database connection settings,
+        the logging configuration (each scraper still gets its own log file), and the
+        module-level HTTP clients in utils.
+
+        Args:
+            scripts_folder (str): The folder containing the scraping scripts.
+            scripts (list): The file names of the scripts to run.
+            max_workers (int): How many scrapers may run at the same time.
+            logger (logging.Logger): The master scraper's logger.
+        """
+        # Test the database connection once instead of once per scraper
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT COUNT(*) FROM all_books")
+                logger.info(f"Found {cursor.fetchone()[0]} books in the database")
+        except Exception as e:
+            logger.error(f"Database connection error: {e}")
+            return
+
+        entries = load_scrapers(scripts_folder, scripts)
+        logger.info(f"Loaded {len(entries)} scrapers: {[entry.scraper_class.__name__ for entry in entries]}")
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(self.run_entry, entry, logger) for entry in entries]
+            for future in as_completed(futures):
+                script, succeeded, output, duration = future.result()
+                self.log_script_result(logger, script, succeeded, output, duration)
+
+    @staticmethod
+    def run_entry(entry, logger):
+        """
+        Runs a single in-process scraper.
+
+        The scraper logs through its own logger, so only errors need to be captured here.
+
+        Args:
+            entry (ScraperEntry): The scraper to run.
+            logger (logging.Logger): The master scraper's logger.
+
+        Returns:
+            tuple: The script name, whether it succeeded, its error output and how long it took.
+        """
+        start_time = datetime.datetime.now()
+        try:
+            logger.info(f"Starting to scrape {entry.script}")
+            entry.run()
+            return entry.script, True, f"{entry.scraper_class.__name__}.{entry.entry_point} finished", datetime.datetime.now() - start_time
+        except Exception as e:
+            return entry.script, False, f"{e}\n{traceback.format_exc()}".strip(), datetime.datetime.now() - start_time
+        finally:
+            # Each worker thread has its own Django connection, so close it once the scraper is done
+            connection.close()
+
+    @staticmethod
+    def run_script(scripts_folder, script, env, logger):
+        """
+        Runs a single scraping script in its own process and captures its output.
+
+        Args:
+            scripts_folder (str): The folder containing the scraping scripts.
+            script (str): The file name of the script to run.
+            env (dict): The environment to run the script with.
+            logger (logging.Logger): The logger used to report the start of the script.
+
+        Returns:
+            tuple: The script name, whether it succeeded, its captured output and how long it took.
+        """
+        script_path = os.path.join(scripts_folder, script)
+        start_time = datetime.datetime.now()
+        try:
+            logger.info(f"Starting to scrape {script}")
+            result = subprocess.run(
+                ["python", script_path],
+                check=True,
+                capture_output=True,
+                text=True,
+                env=env
+            )
+            return script, True, result.stderr.strip(), datetime.datetime.now() - start_time
+        except subprocess.CalledProcessError as e:
+            return script, False, e.stderr.strip(), datetime.datetime.now() - start_time
+
+    def log_script_result(self, logger, script, succeeded, output, duration):
+        """
+        Logs the captured output of a finished script, tagged with the script name.
+        """
+        if succeeded:
+            logger.info(f"Output of {script} ({self.format_duration(duration)}):\n{output}")
+        else:
+            logger.error(f"Error occurred while running {script} ({self.format_duration(duration)}):\n{output}")
+
     @staticmethod
     def format_duration(duration):
         """
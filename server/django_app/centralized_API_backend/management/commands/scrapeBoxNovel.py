@@ -104,6 +104,7 @@ class BoxNovelScraper:
         start_time = datetime.datetime.now()
         title, url = title_url_tuple
         normalized_title = title.replace('(WN)', '').replace('Web Novel', '').strip()
+        driver = None
         try:
             driver = self.driver_pool.get_driver()
             driver.get(url)
@@ -196,6 +197,7 @@ class BoxNovelScraper:
         Uses multi-threading for faster scraping.
         """
         base_url = 'https://boxnovel.com/novel/'
+        driver = None
         try:
             driver = self.driver_pool.get_driver()
             books = self.scrape_main_page(base_url, driver=driver)
@@ -5,11 +5,8 @@ import os
 import re
 import django
 import logging
-import requests
 import urllib.parse
-from logging.handlers import RotatingFileHandler
 from bs4 import BeautifulSoup
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from requests.exceptions import RequestException, HTTPError, ConnectionError, Timeout, TooManyRedirects
 from dateutil.parser import parse
 from django.core.management.base import BaseCommand, CommandError
@@ -18,38 +15,18 @@ from django.core.exceptions import ValidationError
 from bson import ObjectId, Decimal128
 import traceback
 import sys
+from centralized_API_backend.management.commands.utils.concurrency import get_worker_budget
+from centralized_API_backend.management.commands.utils.scraper_logging import get_scraper_logger
+from centralized_API_backend.management.commands.utils import http_client
+from centralized_API_backend.management.commands.utils.html_parsing import fetch_soup, parse_response, SERIES_LINKS
+from centralized_API_backend.management.commands.utils.list_mode_engine import ListModeEngine
+from centralized_API_backend.management.commands.utils.book_writer import book_writer
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'django_app.django_app.settings')
 django.setup()
 
-def get_next_log_file_name(base_dir, base_filename):
-    counter = 0
-    while True:
-        log_file_name = f"{base_filename}_{counter}.txt" if counter else f"{base_filename}.txt"
-        full_path = os.path.join(base_dir, log_file_name)
-        if not os.path.exists(full_path):
-            return full_path
-        counter += 1
-
-# Setting up the logging configuration
-log_directory = "../out/AnimatedGlitchedScans"
-log_base_filename = "scrapeAnimatedGlitchedScans"
-log_file_path = get_next_log_file_name(log_directory, log_base_filename)
-
-# Ensure the log directory exists
-os.makedirs(log_directory, exist_ok=True)
-
 # Setting up the logging config, storing as a file and outputting to console
-logging.basicConfig(
-    level=logging.INFO,
-    format="[%(levelname)s] %(asctime)s - %(message)s",
-    datefmt="%Y-%m-%d %H:%M:%S",
-    handlers=[
-        RotatingFileHandler(log_file_path, maxBytes=10485760, backupCount=5),  # 10MB per file, max 5 files of size 10 MB
-        logging.StreamHandler()
-    ]
-)
-logger = logging.getLogger("AnimatedGlitchedScansScraper")
+logger = get_scraper_logger("AnimatedGlitchedScans")
 
 class AnimatedGlitchedScansScraper:
     def scrape_animated_glitched_scans(self):
@@ -65,22 +42,8 @@ class AnimatedGlitchedScansScraper:
             logger.error("Unsuccessful scraping. It is assumed to be a network issue - please try again in 3+ minutes.")
         else:
             total_books = len(books)
-            with ThreadPoolExecutor(max_workers=5) as executor:
-                future_to_title = {executor.submit(self.scrape_book_and_update_db, title_url, idx + 1, total_books): title_url for idx, title_url in enumerate(books.items())}
-
-                for future in as_completed(future_to_title):
-                    title_url = future_to_title[future]
-                    try:
-                        result = future.result()
-                        if result['status'] == 'processed':
-                            pushed_books += 1
-                        elif result['status'] == 'skipped':
-                            continue
-                        else:
-                            error_books += 1
-                    except Exception as e:
-                        logger.error(f"Error processing {title_url}: {e}")
-                        error_books += 1
+            results = ListModeEngine(self, 'Animated Glitched Scans', initial_limit=get_worker_budget(10), logger=logger).run(books.items())
+            pushed_books, error_books = results['processed'], results['error']
 
             logger.info(f"{total_books} books scraped. {pushed_books} updated, {error_books} errors, {total_books - pushed_books - error_books} unchanged.")
 
@@ -106,20 +69,20 @@ class AnimatedGlitchedScansScraper:
         match = re.search(r'\d+', chapter_str)
         return match.group(0) if match else None
 
-    def scrape_book_details(self, book_url):
+    def scrape_book_details(self, book_url, soup=None):
         """
         Scrapes detailed information about a book from its individual page.
 
         Args:
         book_url (str): URL of the book's detail page.
+        soup (BeautifulSoup, optional): The already parsed book page. Downloaded if not given.
 
         Returns:
         dict: A dictionary containing key details of the book. Returns None if scraping fails.
         """
         try:
-            response = requests.get(book_url)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
+            if soup is None:
+                soup = fetch_soup(book_url)
 
             details = {
                 'title': self.get_text_or_default(soup, ('h1', {'class': 'entry-title'})),
@@ -193,9 +156,9 @@ class AnimatedGlitchedScansScraper:
         dict: Dictionary containing book titles and their details.
         """
         try:
-            response = requests.get(url)
+            response = http_client.get(url)
             response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
+            soup = parse_response(response, parse_only=SERIES_LINKS)
             book_elements = soup.find_all('a', class_='series')
 
             books = {}
@@ -316,7 +279,7 @@ class AnimatedGlitchedScansScraper:
         """
         return title.replace("'", "’")
 
-    def scrape_book_and_update_db(self, title_url_tuple, book_number, total_books):
+    def scrape_book_and_update_db(self, title_url_tuple, book_number, total_books, soup=None, parsed=None):
         title, url = title_url_tuple
         try:
             start_time = datetime.datetime.now()
@@ -328,61 +291,29 @@ class AnimatedGlitchedScansScraper:
                 cursor.execute("SELECT newest_chapter FROM all_books WHERE title = %s AND novel_source = %s", [normalized_title.strip(), 'Animated Glitched Scans'])
                 existing_book = cursor.fetchone()
 
-            newest_chapter = self.scrape_newest_chapter(url)
+            # Download and parse the book page once (unless ListModeEngine already did), for both the skip check and the full details
+            if parsed is not None:
+                # Pipeline mode: the page was already parsed in a worker process (see ListModeEngine)
+                newest_chapter, details = parsed
+            else:
+                if soup is None:
+                    soup = fetch_soup(url)
+                newest_chapter = self.scrape_newest_chapter(url, soup=soup)
             if existing_book and newest_chapter == existing_book[0]:
                 # duration = datetime.datetime.now() - start_time
                 # formatted_duration = self.format_duration(duration)
                 # logger.info(f"{book_number}/{total_books} took {formatted_duration} to 'skip': {normalized_title}")
                 return {'status': 'skipped', 'title': normalized_title}
 
-            details = self.scrape_book_details(url)
+            if parsed is None:
+                details = self.scrape_book_details(url, soup=soup)
 
             if not details['chapters'] or len(details['chapters']) == 0:
                 logger.warning(f"No chapters found for {normalized_title}. Skipping.")
                 return {'status': 'skipped', 'title': normalized_title}
 
-            with connection.cursor() as cursor:
-                cursor.execute("""
-                    INSERT INTO all_books (title, synopsis, author, updated_on, newest_chapter, image_url, rating, status, novel_type, novel_source, followers, chapters)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    ON CONFLICT (title, novel_source)
-                    DO UPDATE SET
-                        synopsis = EXCLUDED.synopsis,
-                        author = EXCLUDED.author,
-                        updated_on = EXCLUDED.updated_on,
-                        newest_chapter = EXCLUDED.newest_chapter,
-                        image_url = EXCLUDED.image_url,
-                        rating = EXCLUDED.rating,
-                        status = EXCLUDED.status,
-                        novel_type = EXCLUDED.novel_type,
-                        followers = EXCLUDED.followers,
-                        chapters = EXCLUDED.chapters
-                """, [
-                    details['title'].strip(),
-                    details['synopsis'],
-                    details['author'],
-                    details['updated_on'],
-                    details['newest_chapter'],
-                    details['image_url'],
-                    details['rating'],
-                    details['status'],
-                    details['novel_type'],
-                    details['novel_source'],
-                    details['followers'],
-                    json.dumps(details['chapters'])
-                ])
-
-                cursor.execute("DELETE FROM all_books_genres WHERE allbooks_title = %s AND allbooks_novel_source = %s", [details['title'].strip(), details['novel_source']])
-                for genre_name in details['genres']:
-                    genre_name = genre_name.strip().lower()
-                    cursor.execute("SELECT id FROM genre WHERE name = %s", [genre_name])
-                    genre_id = cursor.fetchone()
-                    if not genre_id:
-                        cursor.execute("INSERT INTO genre (name) VALUES (%s) RETURNING id", [genre_name])
-                        genre_id = cursor.fetchone()[0]
-                    else:
-                        genre_id = genre_id[0]
-                    cursor.execute("INSERT INTO all_books_genres (genre_id, allbooks_title, allbooks_novel_source) VALUES (%s, %s, %s)", [genre_id, details['title'].strip(), details['novel_source']])
+            # Queue the book; it is written to the database with the rest of its batch (see utils/book_writer.py)
+            book_writer.add(details, url=url)
 
             duration = datetime.datetime.now() - start_time
             formatted_duration = self.format_duration(duration)
@@ -404,11 +335,10 @@ class AnimatedGlitchedScansScraper:
             logger.error(f"Traceback: {''.join(traceback.format_tb(exc_traceback))}")
             return {'status': 'error', 'title': normalized_title, 'message': str(e)}
 
-    def scrape_newest_chapter(self, url):
+    def scrape_newest_chapter(self, url, soup=None):
         try:
-            response = requests.get(url)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
+            if soup is None:
+                soup = fetch_soup(url)
             return self.extract_chapter_number(self.get_text_or_default(soup, ('span', {'class': 'epcur epcurlast'})))
         except (HTTPError, ConnectionError, Timeout, TooManyRedirects, RequestException) as e:
             logger.error(f"Error occurred while fetching newest chapter from {url}: {e}")
@@ -5,9 +5,7 @@ import os
 import re
 import django
 import logging
-import requests
 import urllib.parse
-from logging.handlers import RotatingFileHandler
 from bs4 import BeautifulSoup
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from requests.exceptions import RequestException, HTTPError, ConnectionError, Timeout, TooManyRedirects
@@ -18,38 +16,18 @@ from django.core.exceptions import ValidationError
 from bson import ObjectId, Decimal128
 import traceback
 import sys
+from centralized_API_backend.management.commands.utils.concurrency import get_worker_budget, concurrency_controller
+from centralized_API_backend.management.commands.utils.scraper_logging import get_scraper_logger
+from centralized_API_backend.management.commands.utils import http_client
+from centralized_API_backend.management.commands.utils.html_parsing import fetch_soup, parse_response, SERIES_CARDS
+from centralized_API_backend.management.commands.utils.http_cache import validator_cache
+from centralized_API_backend.management.commands.utils.book_writer import book_writer
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'django_app.django_app.settings')
 django.setup()
 
-def get_next_log_file_name(base_dir, base_filename):
-    counter = 0
-    while True:
-        log_file_name = f"{base_filename}_{counter}.txt" if counter else f"{base_filename}.txt"
-        full_path = os.path.join(base_dir, log_file_name)
-        if not os.path.exists(full_path):
-            return full_path
-        counter += 1
-
-# Setting up the logging configuration
-log_directory = "../out/ArvenComics"
-log_base_filename = "scrapeArvenComics"
-log_file_path = get_next_log_file_name(log_directory, log_base_filename)
-
-# Ensure the log directory exists
-os.makedirs(log_directory, exist_ok=True)
-
 # Setting up the logging config, storing as a file and outputting to console
-logging.basicConfig(
-    level=logging.INFO,
-    format="[%(levelname)s] %(asctime)s - %(message)s",
-    datefmt="%Y-%m-%d %H:%M:%S",
-    handlers=[
-        RotatingFileHandler(log_file_path, maxBytes=10485760, backupCount=5),  # 10MB per file, max 5 files of size 10 MB
-        logging.StreamHandler()
-    ]
-)
-logger = logging.getLogger("ArvenComicsScraper")
+logger = get_scraper_logger("ArvenComics")
 
 class ArvenComicsScraper:
     def scrape_arven_comics(self):
@@ -65,13 +43,17 @@ class ArvenComicsScraper:
             logger.error("Unsuccessful scraping. It is assumed to be a network issue - please try again in 3+ minutes.")
         else:
             total_books = len(books)
-            with ThreadPoolExecutor(max_workers=5) as executor:
+            completed_urls = []
+            validator_cache.preload(books.values())
+            with ThreadPoolExecutor(max_workers=get_worker_budget(concurrency_controller.suggest_workers(url, default=5))) as executor:
                 future_to_title = {executor.submit(self.scrape_book_and_update_db, title_url, idx + 1, total_books): title_url for idx, title_url in enumerate(books.items())}
 
                 for future in as_completed(future_to_title):
                     title_url = future_to_title[future]
                     try:
                         result = future.result()
+                        if result['status'] in ('processed', 'skipped'):
+                            completed_urls.append(title_url[1])
                         if result['status'] == 'processed':
                             pushed_books += 1
                         elif result['status'] == 'skipped':
@@ -82,8 +64,14 @@ class ArvenComicsScraper:
                         logger.error(f"Error processing {title_url}: {e}")
                         error_books += 1
 
+            # Books that could not be written count as errors, and their pages must not answer 304 next time
+            failed_urls = set(book_writer.flush('Arven Comics').values())
+            pushed_books -= len(failed_urls)
+            error_books += len(failed_urls)
             logger.info(f"{total_books} books scraped. {pushed_books} updated, {error_books} errors, {total_books - pushed_books - error_books} unchanged.")
 
+            validator_cache.commit(url for url in completed_urls if url not in failed_urls)
+
     def get_text_or_default(self, soup, selector, attribute=None, default='Not Available'):
         """
         Extracts text or a specified attribute from an element selected from a BeautifulSoup object.
@@ -106,20 +94,20 @@ class ArvenComicsScraper:
         match = re.search(r'\d+', chapter_str)
         return match.group(0) if match else None
 
-    def scrape_book_details(self, book_url):
+    def scrape_book_details(self, book_url, soup=None):
         """
         Scrapes detailed information about a book from its individual page.
 
         Args:
         book_url (str): URL of the book's detail page.
+        soup (BeautifulSoup, optional): The already parsed book page. Downloaded if not given.
 
         Returns:
         dict: A dictionary containing key details of the book. Returns None if scraping fails.
         """
         try:
-            response = requests.get(book_url)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
+            if soup is None:
+                soup = fetch_soup(book_url)
 
             details = {
                 'title': self.get_text_or_default(soup, ('h1', {'class': 'entry-title'})),
@@ -201,9 +189,9 @@ class ArvenComicsScraper:
         dict: Dictionary containing book titles and their details.
         """
         try:
-            response = requests.get(url)
+            response = http_client.get(url)
             response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
+            soup = parse_response(response, parse_only=SERIES_CARDS)
             book_elements = soup.find_all('div', class_='bsx')
 
             books = {}
@@ -337,61 +325,26 @@ class ArvenComicsScraper:
                 cursor.execute("SELECT newest_chapter FROM all_books WHERE title = %s AND novel_source = %s", [normalized_title.strip(), 'Arven Comics'])
                 existing_book = cursor.fetchone()
 
-            newest_chapter = self.scrape_newest_chapter(url)
+            # Download and parse the book page once, for both the skip check and the full details.
+            # Pages that have not changed since they were last stored answer 304 and are skipped without parsing.
+            soup = fetch_soup(url, conditional=True)
+            if soup is None:
+                return {'status': 'skipped', 'title': normalized_title}
+            newest_chapter = self.scrape_newest_chapter(url, soup=soup)
             if existing_book and newest_chapter == existing_book[0]:
                 # duration = datetime.datetime.now() - start_time
                 # formatted_duration = self.format_duration(duration)
                 # logger.info(f"{book_number}/{total_books} took {formatted_duration} to 'skip': {normalized_title}")
                 return {'status': 'skipped', 'title': normalized_title}
 
-            details = self.scrape_book_details(url)
+            details = self.scrape_book_details(url, soup=soup)
 
             if not details['chapters'] or len(details['chapters']) == 0:
                 logger.warning(f"No chapters found for {normalized_title}. Skipping.")
                 return {'status': 'skipped', 'title': normalized_title}
 
-            with connection.cursor() as cursor:
-                cursor.execute("""
-                    INSERT INTO all_books (title, synopsis, author, updated_on, newest_chapter, image_url, rating, status, novel_type, novel_source, followers, chapters)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    ON CONFLICT (title, novel_source)
-                    DO UPDATE SET
-                        synopsis = EXCLUDED.synopsis,
-                        author = EXCLUDED.author,
-                        updated_on = EXCLUDED.updated_on,
-                        newest_chapter = EXCLUDED.newest_chapter,
-                        image_url = EXCLUDED.image_url,
-                        rating = EXCLUDED.rating,
-                        status = EXCLUDED.status,
-                        novel_type = EXCLUDED.novel_type,
-                        followers = EXCLUDED.followers,
-                        chapters = EXCLUDED.chapters
-                """, [
-                    details['title'].strip(),
-                    details['synopsis'],
-                    details['author'],
-                    details['updated_on'],
-                    details['newest_chapter'],
-                    details['image_url'],
-                    details['rating'],
-                    details['status'],
-                    details['novel_type'],
-                    details['novel_source'],
-                    details['followers'],
-                    json.dumps(details['chapters'])
-                ])
-
-                cursor.execute("DELETE FROM all_books_genres WHERE allbooks_title = %s AND allbooks_novel_source = %s", [details['title'].strip(), details['novel_source']])
-                for genre_name in details['genres']:
-                    genre_name = genre_name.strip().lower()
-                    cursor.execute("SELECT id FROM genre WHERE name = %s", [genre_name])
-                    genre_id = cursor.fetchone()
-                    if not genre_id:
-                        cursor.execute("INSERT INTO genre (name) VALUES (%s) RETURNING id", [genre_name])
-                        genre_id = cursor.fetchone()[0]
-                    else:
-                        genre_id = genre_id[0]
-                    cursor.execute("INSERT INTO all_books_genres (genre_id, allbooks_title, allbooks_novel_source) VALUES (%s, %s, %s)", [genre_id, details['title'].strip(), details['novel_source']])
+            # Queue the book; it is written to the database with the rest of its batch (see utils/book_writer.py)
+            book_writer.add(details, url=url)
 
             duration = datetime.datetime.now() - start_time
             formatted_duration = self.format_duration(duration)
@@ -413,10 +366,9 @@ class ArvenComicsScraper:
             logger.error(f"Traceback: {''.join(traceback.format_tb(exc_traceback))}")
             return {'status': 'error', 'title': normalized_title, 'message': str(e)}
 
-    def scrape_newest_chapter(self, url):
-        response = requests.get(url)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
+    def scrape_newest_chapter(self, url, soup=None):
+        if soup is None:
+            soup = fetch_soup(url)
         chapter_elements = soup.select('#chapterlist li[data-num]')
         return chapter_elements[0]['data-num'] if chapter_elements else None
 
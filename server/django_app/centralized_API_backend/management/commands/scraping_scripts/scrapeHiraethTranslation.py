@@ -8,7 +8,6 @@ import logging
 import traceback
 import threading
 import sys
-from logging.handlers import RotatingFileHandler
 from requests.exceptions import ConnectionError
 from django.core.management.base import BaseCommand, CommandError
 from django.utils import timezone
@@ -26,43 +25,19 @@ from selenium.common.exceptions import TimeoutException
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from queue import Queue
 from centralized_API_backend.management.commands.utils.driver_pool import DriverPool
+from centralized_API_backend.management.commands.utils.concurrency import get_worker_budget, concurrency_controller, BROWSER_MAX_LIMIT, KIND_BROWSER
+from centralized_API_backend.management.commands.utils.scraper_logging import get_scraper_logger
+from centralized_API_backend.management.commands.utils.book_writer import book_writer
+from centralized_API_backend.management.commands.utils.madara import MadaraSite, read_info_panel
+from centralized_API_backend.management.commands.utils.hybrid_fetch import HybridFetcher
+from centralized_API_backend.management.commands.utils.waits import count_elements, wait_for_more_elements
+from centralized_API_backend.management.commands.utils.dom_extraction import extract, extract_links, Field
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'django_app.django_app.settings')
 django.setup()
 
-def get_next_log_file_name(base_dir, base_filename):
-    counter = 0
-    while True:
-        log_file_name = f"{base_filename}_{counter}.txt" if counter else f"{base_filename}.txt"
-        full_path = os.path.join(base_dir, log_file_name)
-        if not os.path.exists(full_path):
-            return full_path
-        counter += 1
-
-# Setting up the logging configuration
-log_directory = "../out/HiraethTranslation"
-log_base_filename = "scrapeHiraethTranslation"
-log_file_path = get_next_log_file_name(log_directory, log_base_filename)
-
-# Ensure the log directory exists
-os.makedirs(log_directory, exist_ok=True)
-
 # Setting up the logging config, storing as a file and outputting to console
-logging.basicConfig(
-    level=logging.INFO,
-    format="[%(levelname)s] %(asctime)s - %(message)s",
-    datefmt="%Y-%m-%d %H:%M:%S",
-    handlers=[
-        RotatingFileHandler(log_file_path, maxBytes=10485760, backupCount=5),  # 10MB per file, max 5 files of size 10 MB
-        logging.StreamHandler()
-    ]
-)
-
-# Suppressing unnessary Selenium Web Driver Manager logs
-logging.getLogger('WDM').setLevel(logging.WARNING)
-
-# Set logger for all other log messages
-logger = logging.getLogger("HiraethTranslationScraper")
+logger = get_scraper_logger("HiraethTranslation")
 
 class HiraethTranslationScraper:
     def __init__(self):
@@ -83,8 +58,11 @@ class HiraethTranslationScraper:
         # 3 > 2 > 5. Test 4 to see where it stands 
         # Too many threads = server ban or system overload 
         # Too little threads = slower scraping time
-        self.MAX_THREADS = 3 # max thread count (or number of concurrent windows used for scraping)
+        # Starts from the concurrency learned for the site on previous runs (3 for a new site); navigate_to_url then adapts it while scraping
+        self.MAX_THREADS = get_worker_budget(concurrency_controller.suggest_workers('https://hiraethtranslation.com', default=3, max_workers=BROWSER_MAX_LIMIT)) # max thread count (or number of concurrent windows used for scraping)
         self.driver_pool = DriverPool(size=self.MAX_THREADS)
+        self.fetcher = HybridFetcher('Hiraeth Translation', ['.listing-chapters_wrap .wp-manga-chapter a'], logger=logger)
+        self.madara = MadaraSite(logger=logger)
         self.continue_scraping = True
         self.skipped_threshold = 200
 
@@ -100,9 +78,9 @@ class HiraethTranslationScraper:
             return {'status': 'cancelled', 'title': title_url_tuple[0]}
     
         title, url = title_url_tuple
+        driver = None
         try:
             driver = self.driver_pool.get_driver()
-            driver.get(url)
             
             start_time = datetime.datetime.now()
 
@@ -120,51 +98,8 @@ class HiraethTranslationScraper:
 
             details = self.scrape_book_details(title, url, driver)
 
-            # Attempt to update an existing book or create a new one
-            # TODO: Come back to this --> May want to store then push at the end to avoid "concurrency issues" **
-            # Look into batching --> bulk create or bulk update
-            with connection.cursor() as cursor:
-                cursor.execute("""
-                    INSERT INTO all_books (title, synopsis, author, updated_on, newest_chapter, image_url, rating, status, novel_type, novel_source, followers, chapters)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    ON CONFLICT (title, novel_source)
-                    DO UPDATE SET
-                        synopsis = EXCLUDED.synopsis,
-                        author = EXCLUDED.author,
-                        updated_on = EXCLUDED.updated_on,
-                        newest_chapter = EXCLUDED.newest_chapter,
-                        image_url = EXCLUDED.image_url,
-                        rating = EXCLUDED.rating,
-                        status = EXCLUDED.status,
-                        novel_type = EXCLUDED.novel_type,
-                        followers = EXCLUDED.followers,
-                        chapters = EXCLUDED.chapters
-                """, [
-                    details['title'],
-                    details['synopsis'],
-                    details['author'],
-                    details['updated_on'],
-                    details['newest_chapter'],
-                    details['image_url'],
-                    details['rating'],
-                    details['status'],
-                    details['novel_type'],
-                    details['novel_source'],
-                    details['followers'],
-                    json.dumps(details['chapters'])
-                ])
-
-                cursor.execute("DELETE FROM all_books_genres WHERE allbooks_title = %s AND allbooks_novel_source = %s", [details['title'], details['novel_source']])
-                for genre_name in details['genres']:
-                    genre_name = genre_name.strip().lower()
-                    cursor.execute("SELECT id FROM genre WHERE name = %s", [genre_name])
-                    genre_id = cursor.fetchone()
-                    if not genre_id:
-                        cursor.execute("INSERT INTO genre (name) VALUES (%s) RETURNING id", [genre_name])
-                        genre_id = cursor.fetchone()[0]
-                    else:
-                        genre_id = genre_id[0]
-                    cursor.execute("INSERT INTO all_books_genres (genre_id, allbooks_title, allbooks_novel_source) VALUES (%s, %s, %s)", [genre_id, details['title'], details['novel_source']])
+            # Queue the book; it is written to the database with the rest of its batch (see utils/book_writer.py)
+            book_writer.add(details, url=url)
 
             duration = datetime.datetime.now() - start_time
             formatted_duration = self.format_duration(duration)
@@ -201,6 +136,10 @@ class HiraethTranslationScraper:
         ]
 
         def scrape_books_from_url(base_url):
+            books = self.madara.list_books(base_url)
+            if books is not None:
+                return books
+            driver = None
             try:
                 driver = self.driver_pool.get_driver()
                 books = self.scrape_main_page(base_url, driver=driver)
@@ -262,6 +201,10 @@ class HiraethTranslationScraper:
                         results['skipped'] += consecutive_skipped
                         consecutive_skipped = 0
         
+        # Books that could not be written count as errors, so they are retried on the next run
+        failed = book_writer.flush('Hiraeth Translation')
+        results['processed'] -= len(failed)
+        results['error'] += len(failed)
         self.driver_pool.close_all_drivers()
         results['skipped'] += consecutive_skipped
         logger.info(f"Books Processed: {results['processed']}, Skipped: {results['skipped'] + results['cancelled']}, Errors: {results['error']}")
@@ -284,23 +227,20 @@ class HiraethTranslationScraper:
         books = []
 
         while True:
-            book_elements = self.wait_for_elements(By.CLASS_NAME, 'page-item-detail', driver=driver)
-            for element in book_elements:
-                title = self.get_element_text(By.CSS_SELECTOR, '.post-title a', default_text='Title not available', element=element, driver=driver)
-                book_url = self.get_element_attribute(By.CSS_SELECTOR, '.post-title a', 'href', default_value=None, element=element, driver=driver)
-                books.append((title, book_url))
+            # Every card's title and link, and the next page link, in one script call instead of a few WebDriver calls per card
+            page = extract(driver, {
+                'books': Field('.page-item-detail .post-title a', many=True, fields={'text': Field(None), 'href': Field(None, 'href')}),
+                'next_page': Field('.nextpostslink', 'href'),
+            }, wait_for='.page-item-detail .post-title a')
+            books.extend((book['text'], book['href']) for book in page['books'])
 
             logger.info(f"Found {len(books)} books on {driver.current_url}")
 
-            next_page_element = self.wait_for_element(By.CSS_SELECTOR, '.nextpostslink', driver=driver)
-            if next_page_element:
-                next_page_url = next_page_element.get_attribute('href')
-                if next_page_url:
-                    self.navigate_to_url(next_page_url, driver=driver)
-                else:
-                    break  # No more pages to navigate
+            # The pagination is rendered with the cards, so there is nothing more to wait for: no link means the last page
+            if page['next_page']:
+                self.navigate_to_url(page['next_page'], driver=driver)
             else:
-                break  # No next page element found
+                break
 
         return books
 
@@ -316,7 +256,11 @@ class HiraethTranslationScraper:
             str: The newest chapter of the book.
         """
         try:
-            return self.get_element_text(By.CSS_SELECTOR, '.listing-chapters_wrap .wp-manga-chapter a', 'Chapter not available', driver=driver)
+            # Over plain HTTP when the site renders the chapter list server-side, so skipped books never load in the browser
+            soup = self.fetcher.fetch(book_url, driver)
+            element = soup.select_one('.listing-chapters_wrap .wp-manga-chapter a')
+            # Whitespace collapsed the way the browser's element.text does, so it compares equal to the stored chapter
+            return ' '.join(element.get_text().split()) if element else 'Chapter not available'
         except NoSuchElementException as e:
             logger.warning(f"Element not found in {book_url}: {e}")
             return None
@@ -337,46 +281,43 @@ class HiraethTranslationScraper:
             dict: A dictionary containing key details of the book.
         """
         try:
-            self.navigate_to_url(book_url, driver=driver)
-
-            # Extract details
-            synopsis_str = self.wait_for_element(By.CSS_SELECTOR, '.description-summary .summary__content', driver=driver)
-            synopsis = synopsis_str.get_attribute('textContent').replace('(adsbygoogle = window.adsbygoogle || []).push({});', '').strip() if synopsis_str and synopsis_str.get_attribute('textContent') else 'Synopsis not available'
-            authors = self.wait_for_elements(By.CSS_SELECTOR, '.summary-content .author-content a', driver=driver, do_not_throw_error=True)
-            author = ', '.join([author.text.strip() for author in authors]) if authors else 'Author not available'
-            updated_on_text = self.get_element_text(By.CSS_SELECTOR, '.chapter-release-date i', driver=driver)
-            newest_chapter = self.get_element_text(By.CSS_SELECTOR, '.listing-chapters_wrap .wp-manga-chapter a', driver=driver)
-            genres = [genre.text.strip() for genre in self.wait_for_elements(By.CSS_SELECTOR, '.summary-content .genres-content a', driver=driver)]
+            # scrape_book_and_update_db has already loaded this page for the skip check, so don't load it twice
+            if driver.current_url.rstrip('/') != book_url.rstrip('/'):
+                self.navigate_to_url(book_url, driver=driver)
+
+            # Extract details: the whole info panel in one script call, instead of a WebDriver call per value
+            panel = read_info_panel(driver)
+            synopsis = panel['synopsis'].replace('(adsbygoogle = window.adsbygoogle || []).push({});', '').strip() if panel['synopsis'] else 'Synopsis not available'
+            author = ', '.join(panel['authors']) or 'Author not available'
+            updated_on_text = panel['updated_on'] or 'Not Available'
+            newest_chapter = panel['newest_chapter'] or 'Not Available'
+            genres = panel['genres']
             default_image_url = "https://via.placeholder.com/400x600/CCCCCC/FFFFFF?text=No+Image"
-            image_url = self.get_element_attribute(By.CSS_SELECTOR, '.summary_image img', 'src', driver=driver) or default_image_url
-            rating = self.get_element_text(By.CSS_SELECTOR, '.post-total-rating .score', driver=driver)
-            status = self.get_value_based_on_heading("Status", driver)
-            followers_str = self.get_value_based_on_heading("Rank", driver)
+            image_url = panel['image_url'] or default_image_url
+            rating = panel['rating'] or 'Not Available'
+            status = panel['headings'].get("Status") or 'N/A'
+            followers_str = panel['headings'].get("Rank") or 'N/A'
             followers = self.parse_followers(followers_str.split(' ')[-2]) if followers_str != 'N/A' else 'N/A'
             updated_on = self.parse_relative_date(updated_on_text).strftime('%Y-%m-%dT%H:%M:%S%z')
-            novel_type = self.get_value_based_on_heading("Type", driver).lower().capitalize()
-
-            try:
-                next_page_element = self.wait_for_element(By.CLASS_NAME, 'chapter-readmore', timeout=5, driver=driver)
-                if next_page_element:
-                    driver.execute_script("arguments[0].scrollIntoView(true);", next_page_element)
-                    WebDriverWait(driver, 10).until(EC.element_to_be_clickable((By.CLASS_NAME, 'chapter-readmore')))
-                    driver.execute_script("arguments[0].click();", next_page_element)
-                    time.sleep(3) # TODO: Wait for the page to load. I don't love this hardcoded, but it works for now.
-            except TimeoutException:
-                # Yeah I guess keep going? It just means that there's less than 5 chapters ...
-                pass
-
-            chapters = {}
-            try:
-                chapter_elements = self.wait_for_elements(By.CSS_SELECTOR, 'ul.version-chap a', timeout=5, driver=driver)
-                for chapter in chapter_elements:
-                    chapter_title = chapter.text.strip()
-                    chapter_url = chapter.get_attribute('href')
-                    if chapter_title and chapter_url:
-                        chapters[chapter_title] = chapter_url
-            except TimeoutException:
-                chapters = {}
+            novel_type = (panel['headings'].get("Type") or 'N/A').lower().capitalize()
+
+            # The full chapter list straight from the theme's AJAX endpoint, instead of clicking "Show more" in the browser
+            chapters = self.madara.fetch_chapters(book_url)
+            if chapters is None:
+                try:
+                    next_page_element = self.wait_for_element(By.CLASS_NAME, 'chapter-readmore', timeout=5, driver=driver)
+                    if next_page_element:
+                        driver.execute_script("arguments[0].scrollIntoView(true);", next_page_element)
+                        WebDriverWait(driver, 10).until(EC.element_to_be_clickable((By.CLASS_NAME, 'chapter-readmore')))
+                        loaded = count_elements(driver, By.CSS_SELECTOR, 'ul.version-chap a')
+                        driver.execute_script("arguments[0].click();", next_page_element)
+                        wait_for_more_elements(driver, By.CSS_SELECTOR, 'ul.version-chap a', loaded)
+                except TimeoutException:
+                    # Yeah I guess keep going? It just means that there's less than 5 chapters ...
+                    pass
+
+                # Every label and link in one script call, instead of two WebDriver calls per chapter
+                chapters = {label: url for label, url in extract_links(driver, 'ul.version-chap a', timeout=5) if label and url}
 
             book_details = {
                 'title': title,
@@ -411,7 +352,8 @@ class HiraethTranslationScraper:
             driver (webdriver): The WebDriver instance for the thread.
         """
         try:
-            driver.get(url)
+            with concurrency_controller.slot(url, kind=KIND_BROWSER):
+                driver.get(url)
         except WebDriverException as e:
             logger.error(f"Error navigating to URL {url}: {e}")
             raise
@@ -509,48 +451,6 @@ class HiraethTranslationScraper:
                 logger.warning(f"Element {value} not found, using default value.")
             return default_value
     
-    def get_value_based_on_heading(self, heading, driver):
-        """
-        Gets the value from the summary-content based on the given heading.
-
-        Args:
-            heading (str): The heading to look for (e.g., 'Status', 'Rank').
-            driver (webdriver): The WebDriver instance.
-
-        Returns:
-            str: The corresponding value from the summary-content.
-        """
-        try:
-            items = driver.find_elements(By.CSS_SELECTOR, '.post-content_item')
-            for item in items:
-                heading_text = item.find_element(By.CSS_SELECTOR, '.summary-heading h5').text.strip()
-                if heading_text == heading:
-                    return item.find_element(By.CSS_SELECTOR, '.summary-content').text.strip()
-            return 'N/A'
-        except NoSuchElementException:
-            return 'N/A'
-
-    def process_chapter_element(self, chapter_element, driver):
-        """
-        Processes a single chapter element to extract its title and link.
-
-        Args:
-            chapter_element (WebElement): The web element representing a chapter.
-            driver (webdriver): The WebDriver instance for the thread.
-
-        Returns:
-            tuple: A tuple containing the chapter title and link.
-        """
-        try:
-            number = self.get_element_text(By.CLASS_NAME, 'chapter-no', default_text='', element=chapter_element, driver=driver)
-            title = self.get_element_text(By.CLASS_NAME, 'chapter-title', default_text='', element=chapter_element, driver=driver)
-            chapter_title = f'{number} - {title}' if number else title
-            chapter_link = chapter_element.get_attribute('href')
-            return chapter_title, chapter_link
-        except Exception as e:
-            logger.error(f"Error processing chapter element: {e}")
-            return None, None
-    
     @staticmethod
     def parse_relative_date(time_str):
         """
@@ -5,10 +5,8 @@ import os
 import re
 import django
 import logging
-import requests
 import urllib.parse
-from logging.handlers import RotatingFileHandler
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from requests.exceptions import RequestException, HTTPError, ConnectionError, Timeout, TooManyRedirects
 from dateutil.parser import parse
@@ -19,42 +17,26 @@ from bson import ObjectId, Decimal128
 import traceback
 import sys
 from centralized_API_backend.management.commands.utils.driver_pool import DriverPool
+from centralized_API_backend.management.commands.utils.concurrency import get_worker_budget, concurrency_controller, BROWSER_MAX_LIMIT
+from centralized_API_backend.management.commands.utils.scraper_logging import get_scraper_logger
+from centralized_API_backend.management.commands.utils import http_client
+from centralized_API_backend.management.commands.utils.html_parsing import fetch_soup, parse_response
+from centralized_API_backend.management.commands.utils.book_writer import book_writer
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'django_app.django_app.settings')
 django.setup()
 
-def get_next_log_file_name(base_dir, base_filename):
-    counter = 0
-    while True:
-        log_file_name = f"{base_filename}_{counter}.txt" if counter else f"{base_filename}.txt"
-        full_path = os.path.join(base_dir, log_file_name)
-        if not os.path.exists(full_path):
-            return full_path
-        counter += 1
-
-# Setting up the logging configuration
-log_directory = "../out/HiveScans"
-log_base_filename = "scrapeHiveScans"
-log_file_path = get_next_log_file_name(log_directory, log_base_filename)
-
-# Ensure the log directory exists
-os.makedirs(log_directory, exist_ok=True)
-
 # Setting up the logging config, storing as a file and outputting to console
-logging.basicConfig(
-    level=logging.INFO,
-    format="[%(levelname)s] %(asctime)s - %(message)s",
-    datefmt="%Y-%m-%d %H:%M:%S",
-    handlers=[
-        RotatingFileHandler(log_file_path, maxBytes=10485760, backupCount=5),  # 10MB per file, max 5 files of size 10 MB
-        logging.StreamHandler()
-    ]
-)
-logger = logging.getLogger("HiveScansScraper")
+logger = get_scraper_logger("HiveScans")
+
+# The parts of the listing pages that are read: the "lista" index, then each page's book cards and next-page link
+LISTA_SECTION = SoupStrainer('div', class_='lista')
+LISTING_PAGE = SoupStrainer(['div', 'a'], class_=['bsx', 'next'])
 
 class HiveScansScraper:
     def __init__(self):
-        self.MAX_THREADS = 3 # max thread count (or number of concurrent windows used for scraping)
+        # Starts from the concurrency learned for the site on previous runs (3 for a new site); navigate_to_url then adapts it while scraping
+        self.MAX_THREADS = get_worker_budget(concurrency_controller.suggest_workers('https://hivetoon.com', default=3, max_workers=BROWSER_MAX_LIMIT)) # max thread count (or number of concurrent windows used for scraping)
         self.driver_pool = DriverPool(size=self.MAX_THREADS)
         self.continue_scraping = True
         self.skipped_threshold = 200
@@ -109,6 +91,10 @@ class HiveScansScraper:
                         results['skipped'] += consecutive_skipped
                         consecutive_skipped = 0
 
+        # Books that could not be written count as errors, so they are retried on the next run
+        failed = book_writer.flush('HiveScans')
+        results['processed'] -= len(failed)
+        results['error'] += len(failed)
         self.driver_pool.close_all_drivers()
         results['skipped'] += consecutive_skipped
         logger.info(f"Books Processed: {results['processed']}, Skipped: {results['skipped'] + results['cancelled']}, Errors: {results['error']}")
@@ -126,7 +112,10 @@ class HiveScansScraper:
                 cursor.execute("SELECT newest_chapter FROM all_books WHERE title = %s AND novel_source = %s", [title, 'HiveScans'])
                 existing_book = cursor.fetchone()
 
-            newest_chapter = self.scrape_newest_chapter(url)
+            # Download and parse the book page once, for both the skip check and the full details.
+            # A page that cannot be fetched has no newest chapter, exactly as when scrape_newest_chapter fetched it itself
+            soup = self.fetch_book_page(url)
+            newest_chapter = self.scrape_newest_chapter(url, soup=soup) if soup is not None else None
             if not newest_chapter or newest_chapter == "Chapter not available" or newest_chapter.strip() == "Chapter  ?":
                 # logger.warning(f"No chapters found for {title}. Skipping.")
                 if existing_book:
@@ -142,54 +131,14 @@ class HiveScansScraper:
                 # logger.info(f"{book_number}/{total_books} took {formatted_duration} to 'skip': {title}")
                 return {'status': 'skipped', 'title': title}
 
-            details = self.scrape_book_details(url)
+            details = self.scrape_book_details(url, soup=soup)
 
             if len(json.dumps(details['chapters'])) == 0:
                 logger.warning(f"No chapters found for {title}. Skipping.")
                 return {'status': 'skipped', 'title': title}
 
-            with connection.cursor() as cursor:
-                cursor.execute("""
-                    INSERT INTO all_books (title, synopsis, author, updated_on, newest_chapter, image_url, rating, status, novel_type, novel_source, followers, chapters)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    ON CONFLICT (title, novel_source)
-                    DO UPDATE SET
-                        synopsis = EXCLUDED.synopsis,
-                        author = EXCLUDED.author,
-                        updated_on = EXCLUDED.updated_on,
-                        newest_chapter = EXCLUDED.newest_chapter,
-                        image_url = EXCLUDED.image_url,
-                        rating = EXCLUDED.rating,
-                        status = EXCLUDED.status,
-                        novel_type = EXCLUDED.novel_type,
-                        followers = EXCLUDED.followers,
-                        chapters = EXCLUDED.chapters
-                """, [
-                    details['title'],
-                    details['synopsis'],
-                    details['author'],
-                    details['updated_on'],
-                    details['newest_chapter'],
-                    details['image_url'],
-                    details['rating'],
-                    details['status'],
-                    details['novel_type'],
-                    details['novel_source'],
-                    details['followers'],
-                    json.dumps(details['chapters'])
-                ])
-
-                cursor.execute("DELETE FROM all_books_genres WHERE allbooks_title = %s AND allbooks_novel_source = %s", [details['title'], details['novel_source']])
-                for genre_name in details['genres']:
-                    genre_name = genre_name.strip().lower()
-                    cursor.execute("SELECT id FROM genre WHERE name = %s", [genre_name])
-                    genre_id = cursor.fetchone()
-                    if not genre_id:
-                        cursor.execute("INSERT INTO genre (name) VALUES (%s) RETURNING id", [genre_name])
-                        genre_id = cursor.fetchone()[0]
-                    else:
-                        genre_id = genre_id[0]
-                    cursor.execute("INSERT INTO all_books_genres (genre_id, allbooks_title, allbooks_novel_source) VALUES (%s, %s, %s)", [genre_id, details['title'], details['novel_source']])
+            # Queue the book; it is written to the database with the rest of its batch (see utils/book_writer.py)
+            book_writer.add(details, url=url)
 
             duration = datetime.datetime.now() - start_time
             formatted_duration = self.format_duration(duration)
@@ -214,9 +163,9 @@ class HiveScansScraper:
     def scrape_main_page(self, url):
         books = []
         try:
-            response = requests.get(url)
+            response = http_client.get(url)
             response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
+            soup = parse_response(response, parse_only=LISTA_SECTION)
 
             # Get all the URLs from the "lista" section
             lista_links = [a['href'] for a in soup.find('div', class_='lista').find_all('a')]
@@ -224,9 +173,9 @@ class HiveScansScraper:
             for list_url in lista_links:
                 current_url = list_url
                 while current_url:
-                    response = requests.get(current_url)
+                    response = http_client.get(current_url)
                     response.raise_for_status()
-                    soup = BeautifulSoup(response.text, 'html.parser')
+                    soup = parse_response(response, parse_only=LISTING_PAGE)
 
                     book_elements = soup.find_all('div', class_='bsx')
                     for element in book_elements:
@@ -245,20 +194,20 @@ class HiveScansScraper:
 
         return books
 
-    def scrape_book_details(self, book_url):
+    def scrape_book_details(self, book_url, soup=None):
         """
         Scrapes detailed information about a book from its individual page.
 
         Args:
         book_url (str): URL of the book's detail page.
+        soup (BeautifulSoup, optional): The already parsed book page. Downloaded if not given.
 
         Returns:
         dict: A dictionary containing key details of the book. Returns None if scraping fails.
         """
         try:
-            response = requests.get(book_url)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
+            if soup is None:
+                soup = fetch_soup(book_url)
 
             details = {
                 'title': self.get_text_or_default(soup, ('h1', {'class': 'entry-title'})),
@@ -325,11 +274,23 @@ class HiveScansScraper:
 
         return None
 
-    def scrape_newest_chapter(self, book_url):
+    def fetch_book_page(self, book_url):
+        """
+        Downloads and parses a book page, or returns None (logging why) if it could not be fetched.
+        """
         try:
-            response = requests.get(book_url)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
+            return fetch_soup(book_url)
+        except (HTTPError, ConnectionError, Timeout, TooManyRedirects, RequestException) as e:
+            logger.error(f"Error occurred while fetching newest chapter from {book_url}: {e}")
+            return None
+        except Exception as e:
+            logger.error(f"An unexpected error occurred: {e}")
+            return None
+
+    def scrape_newest_chapter(self, book_url, soup=None):
+        try:
+            if soup is None:
+                soup = fetch_soup(book_url)
             return self.get_text_or_default(soup, ('span', {'class': 'epcur epcurlast'}), default='Chapter not available')
         except (HTTPError, ConnectionError, Timeout, TooManyRedirects, RequestException) as e:
             logger.error(f"Error occurred while fetching newest chapter from {book_url}: {e}")
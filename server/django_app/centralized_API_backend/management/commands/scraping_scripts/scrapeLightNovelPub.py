@@ -8,7 +8,6 @@ import logging
 import traceback
 import threading
 import sys
-from logging.handlers import RotatingFileHandler
 from requests.exceptions import ConnectionError
 from django.core.management.base import BaseCommand, CommandError
 from django.utils import timezone
@@ -25,44 +24,37 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from queue import Queue
+from urllib.parse import urljoin
 from centralized_API_backend.management.commands.utils.driver_pool import DriverPool
+from centralized_API_backend.management.commands.utils.concurrency import get_worker_budget, concurrency_controller, BROWSER_MAX_LIMIT, KIND_BROWSER
+from centralized_API_backend.management.commands.utils.scraper_logging import get_scraper_logger
+from centralized_API_backend.management.commands.utils.book_writer import book_writer
+from centralized_API_backend.management.commands.utils.dom_extraction import Field, extract, extract_rows
+from centralized_API_backend.management.commands.utils.hybrid_fetch import HybridFetcher
+from centralized_API_backend.management.commands.utils.chapter_sync import ChapterSync
+
+# A book page's info panel, read in one script call
+INFO_PANEL_FIELDS = {
+    'synopsis': Field('.summary .content'),
+    'author': Field('.author'),
+    'updated_on': Field('nav.content-nav p.update'),
+    'newest_chapter': Field('nav.content-nav p.latest'),
+    'genres': Field('div.categories a', many=True),
+    'image_url': Field('figure.cover img', 'src'),
+    'rating': Field('div.rating-star strong'),
+    'status': Field('div.header-stats span:nth-of-type(4) strong'),
+    'followers': Field('div.header-stats span:nth-of-type(3) strong'),
+}
+
+# Page number in the chapter pages' URLs: the last path segment (.../chapters/page-2) or the query (.../chapters?page=2),
+# so a slug containing 'page-N' is never mistaken for it
+PAGE_NUMBER_PATTERN = re.compile(r'(?:/page-|[?&]page=)(\d+)(?=[?&#]|$)', re.IGNORECASE)
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'django_app.django_app.settings')
 django.setup()
 
-def get_next_log_file_name(base_dir, base_filename):
-    counter = 0
-    while True:
-        log_file_name = f"{base_filename}_{counter}.txt" if counter else f"{base_filename}.txt"
-        full_path = os.path.join(base_dir, log_file_name)
-        if not os.path.exists(full_path):
-            return full_path
-        counter += 1
-
-# Setting up the logging configuration
-log_directory = "../out/LightNovelPub"
-log_base_filename = "scrapeLightNovelPub"
-log_file_path = get_next_log_file_name(log_directory, log_base_filename)
-
-# Ensure the log directory exists
-os.makedirs(log_directory, exist_ok=True)
-
 # Setting up the logging config, storing as a file and outputting to console
-logging.basicConfig(
-    level=logging.INFO,
-    format="[%(levelname)s] %(asctime)s - %(message)s",
-    datefmt="%Y-%m-%d %H:%M:%S",
-    handlers=[
-        RotatingFileHandler(log_file_path, maxBytes=10485760, backupCount=5),  # 10MB per file, max 5 files of size 10 MB
-        logging.StreamHandler()
-    ]
-)
-
-# Suppressing unnessary Selenium Web Driver Manager logs
-logging.getLogger('WDM').setLevel(logging.WARNING)
-
-# Set logger for all other log messages
-logger = logging.getLogger("LightNovelPubScraper")
+logger = get_scraper_logger("LightNovelPub")
 
 class LightNovelPubScraper:
     def __init__(self):
@@ -83,8 +75,12 @@ class LightNovelPubScraper:
         # 3 > 2 > 5. Test 4 to see where it stands 
         # Too many threads = server ban or system overload 
         # Too little threads = slower scraping time
-        self.MAX_THREADS = 3 # max thread count (or number of concurrent windows used for scraping)
+        # Starts from the concurrency learned for the site on previous runs (3 for a new site); navigate_to_url then adapts it while scraping
+        self.MAX_THREADS = get_worker_budget(concurrency_controller.suggest_workers('https://lightnovelpub.vip', default=3, max_workers=BROWSER_MAX_LIMIT)) # max thread count (or number of concurrent windows used for scraping)
         self.driver_pool = DriverPool(size=self.MAX_THREADS)
+        # Chapter pages over plain HTTP when the site allows it, in the browser otherwise
+        self.chapter_fetcher = HybridFetcher('Light Novel Pub chapters', ['ul.chapter-list a'], logger=logger)
+        self.chapter_sync = ChapterSync('Light Novel Pub', logger=logger)
         self.continue_scraping = True
         self.skipped_threshold = 200
 
@@ -101,9 +97,10 @@ class LightNovelPubScraper:
     
         title, url = title_url_tuple
         normalized_title = title.replace('(WN)', '').replace('Web Novel', '').strip()
+        driver = None
         try:
             driver = self.driver_pool.get_driver()
-            driver.get(url)
+            self.navigate_to_url(url, driver=driver)
             
             start_time = datetime.datetime.now()
 
@@ -120,52 +117,12 @@ class LightNovelPubScraper:
                     return {'status': 'skipped', 'title': title}
 
             details = self.scrape_book_details(title, url, driver)
+            if details is None:
+                # Nothing is written, so the stored book (and its chapters) stays as it was until the next run
+                return {'status': 'error', 'title': title, 'message': 'Could not read the book details or its chapters'}
 
-            # Attempt to update an existing book or create a new one
-            # TODO: Come back to this --> May want to store then push at the end to avoid "concurrency issues" **
-            # Look into batching --> bulk create or bulk update
-            with connection.cursor() as cursor:
-                cursor.execute("""
-                    INSERT INTO all_books (title, synopsis, author, updated_on, newest_chapter, image_url, rating, status, novel_type, novel_source, followers, chapters)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    ON CONFLICT (title, novel_source)
-                    DO UPDATE SET
-                        synopsis = EXCLUDED.synopsis,
-                        author = EXCLUDED.author,
-                        updated_on = EXCLUDED.updated_on,
-                        newest_chapter = EXCLUDED.newest_chapter,
-                        image_url = EXCLUDED.image_url,
-                        rating = EXCLUDED.rating,
-                        status = EXCLUDED.status,
-                        novel_type = EXCLUDED.novel_type,
-                        followers = EXCLUDED.followers,
-                        chapters = EXCLUDED.chapters
-                """, [
-                    details['title'],
-                    details['synopsis'],
-                    details['author'],
-                    details['updated_on'],
-                    details['newest_chapter'],
-                    details['image_url'],
-                    details['rating'],
-                    details['status'],
-                    details['novel_type'],
-                    details['novel_source'],
-                    details['followers'],
-                    json.dumps(details['chapters'])
-                ])
-
-                cursor.execute("DELETE FROM all_books_genres WHERE allbooks_title = %s AND allbooks_novel_source = %s", [details['title'], details['novel_source']])
-                for genre_name in details['genres']:
-                    genre_name = genre_name.strip().lower()
-                    cursor.execute("SELECT id FROM genre WHERE name = %s", [genre_name])
-                    genre_id = cursor.fetchone()
-                    if not genre_id:
-                        cursor.execute("INSERT INTO genre (name) VALUES (%s) RETURNING id", [genre_name])
-                        genre_id = cursor.fetchone()[0]
-                    else:
-                        genre_id = genre_id[0]
-                    cursor.execute("INSERT INTO all_books_genres (genre_id, allbooks_title, allbooks_novel_source) VALUES (%s, %s, %s)", [genre_id, details['title'], details['novel_source']])
+            # Queue the book; it is written to the database with the rest of its batch (see utils/book_writer.py)
+            book_writer.add(details, url=url)
 
             duration = datetime.datetime.now() - start_time
             formatted_duration = self.format_duration(duration)
@@ -197,6 +154,7 @@ class LightNovelPubScraper:
         base_url = 'https://lightnovelpub.vip'
         main_url = f'{base_url}/browse/genre-all-25060123/order-updated/status-all'
 
+        driver = None
         try:
             driver = self.driver_pool.get_driver()
             books = self.scrape_main_page(main_url, driver=driver)
@@ -250,6 +208,10 @@ class LightNovelPubScraper:
                         results['skipped'] += consecutive_skipped
                         consecutive_skipped = 0
         
+        # Books that could not be written count as errors, so they are retried on the next run
+        failed = book_writer.flush('Light Novel Pub')
+        results['processed'] -= len(failed)
+        results['error'] += len(failed)
         self.driver_pool.close_all_drivers()
         results['skipped'] += consecutive_skipped
         logger.info(f"Books Processed: {results['processed']}, Skipped: {results['skipped'] + results['cancelled'] - 5 + self.MAX_THREADS}, Errors: {results['error']}")
@@ -272,11 +234,9 @@ class LightNovelPubScraper:
         books = []
 
         while True:
-            book_elements = self.wait_for_elements(By.CLASS_NAME, 'novel-item', driver=driver)
-            for element in book_elements:
-                title = self.get_element_text(By.CLASS_NAME, 'novel-title', default_text='Title not available', element=element, driver=driver)
-                book_url = self.get_element_attribute(By.TAG_NAME, 'a', 'href', default_value=None, element=self.wait_for_element(By.CLASS_NAME, 'novel-title', element=element, driver=driver),  driver=driver)
-                books.append((title, book_url))
+            # Every card's title and link in one script call, instead of a few WebDriver calls per card
+            rows = extract_rows(driver, '.novel-item', {'title': Field('.novel-title'), 'url': Field('.novel-title a', 'href')})
+            books.extend((row['title'] or 'Title not available', row['url']) for row in rows)
             
             next_page_element = self.wait_for_element(By.CLASS_NAME, 'PagedList-skipToNext', timeout=5, driver=driver)
             if next_page_element:
@@ -319,19 +279,23 @@ class LightNovelPubScraper:
         """
         try:
             normalized_title = title.replace('(WN)', '').replace('Web Novel', '').strip()
-            synopsis = self.get_element_text(By.CSS_SELECTOR, '.summary .content', driver=driver)
-            author = self.get_element_text(By.CSS_SELECTOR, '.author', 'Author not available', driver=driver).replace('Author:', '').strip()
-            updated_on = self.get_element_text(By.CSS_SELECTOR, 'nav.content-nav p.update', driver=driver)
-            newest_chapter = self.get_element_text(By.CSS_SELECTOR, 'nav.content-nav p.latest', driver=driver)
-            genres = [genre.text.strip() for genre in self.wait_for_elements(By.CSS_SELECTOR, 'div.categories a', driver=driver)]
-            image_url = self.get_element_attribute(By.CSS_SELECTOR, 'figure.cover img', 'src', driver=driver)
-            rating = self.get_element_text(By.CSS_SELECTOR, 'div.rating-star strong', driver=driver)
-            status = self.get_element_text(By.CSS_SELECTOR, 'div.header-stats span:nth-of-type(4) strong', driver=driver)
-            followers = self.get_element_text(By.CSS_SELECTOR, 'div.header-stats span:nth-of-type(3) strong', driver=driver)
+            # The whole info panel in one script call, instead of a WebDriver call per value
+            panel = extract(driver, INFO_PANEL_FIELDS, wait_for='nav.content-nav')
+            synopsis = panel['synopsis'] or 'Not Available'
+            author = (panel['author'] or 'Author not available').replace('Author:', '').strip()
+            updated_on = panel['updated_on'] or 'Not Available'
+            newest_chapter = panel['newest_chapter'] or 'Not Available'
+            genres = panel['genres']
+            image_url = panel['image_url']
+            rating = panel['rating'] or 'Not Available'
+            status = panel['status'] or 'Not Available'
+            followers = panel['followers'] or 'Not Available'
 
             timezone_aware_updated_on = self.parse_relative_date(updated_on)
 
-            chapters = self.extract_chapters(f'{book_url}/chapters', driver=driver)
+            chapters = self.extract_chapters(f'{book_url}/chapters', normalized_title, driver=driver)
+            if chapters is None:
+                return None
 
             book_details = {
                 'title': normalized_title,
@@ -366,7 +330,8 @@ class LightNovelPubScraper:
             driver (webdriver): The WebDriver instance for the thread.
         """
         try:
-            driver.get(url)
+            with concurrency_controller.slot(url, kind=KIND_BROWSER):
+                driver.get(url)
         except WebDriverException as e:
             logger.error(f"Error navigating to URL {url}: {e}")
             raise
@@ -462,58 +427,128 @@ class LightNovelPubScraper:
             logger.warning(f"Element {value} not found, using default value.")
             return default_value
 
-    def extract_chapters(self, chapters_url, driver):
+    def extract_chapters(self, chapters_url, title, driver):
         """
         Extracts chapter details from a given URL.
 
+        The first page gives the number of pages, so every other page is known up front and they are all
+        fetched at the same time (see HybridFetcher.fetch_all) instead of following "next" links one by one.
+        For a book whose chapters are stored already, only the pages with new chapters are read (see ChapterSync).
+
         Args:
             chapters_url (str): The URL to scrape chapters from.
+            title (str): The book's title in all_books.
             driver (webdriver): The WebDriver instance for the thread.
 
         Returns:
-            dict: A dictionary where each key is a chapter title and each value is the corresponding chapter link.
+            dict: A dictionary where each key is a chapter title and each value is the corresponding chapter link,
+                  or None if a chapter page could not be read (an incomplete list would overwrite the stored one).
         """
-        self.navigate_to_url(chapters_url, driver=driver)
-        book_chapters = {}
         try:
-            while True:
-                chapter_elements = self.wait_for_elements(By.CSS_SELECTOR, 'ul.chapter-list a', driver=driver)
-                for chapter in chapter_elements:                
-                    chapter_title, chapter_link = self.process_chapter_element(chapter, driver=driver)
-                    book_chapters[chapter_title] = chapter_link
-                
-                next_page_element = self.wait_for_element(By.CLASS_NAME, 'PagedList-skipToNext', timeout=5, driver=driver)
-                if next_page_element:
-                    next_page_url = self.get_element_attribute(By.TAG_NAME, 'a', 'href', default_value=None, element=next_page_element, driver=driver)
-                    self.navigate_to_url(next_page_url, driver=driver)
-                else:
-                    break
+            first_page = self.chapter_fetcher.fetch(chapters_url, driver)
+            page_urls = self.chapter_page_urls(first_page, chapters_url)
+            first_chapters = self.parse_chapter_page(first_page, chapters_url)
+
+            stored = self.chapter_sync.stored_chapters(title)
+            if stored is not None:
+                chapters = self.extract_new_chapters(title, first_chapters, page_urls, stored, driver)
+                if chapters is not None:
+                    return chapters
+
+            pages = self.chapter_fetcher.fetch_all(page_urls, driver, driver_pool=self.driver_pool)
+
+            # Merged in page order, as if the pages had been walked one after the other
+            book_chapters = dict(first_chapters)
+            for page_url, page in zip(page_urls, pages):
+                book_chapters.update(self.parse_chapter_page(page, page_url))
+            self.chapter_sync.synced(title)
+            return book_chapters
         except Exception as e:
-            logger.error(f"An error occurred: {e}")
-
-        return book_chapters
+            logger.error(f"Error reading the chapters of {title} from {chapters_url}: {e}")
+            return None
 
-    def process_chapter_element(self, chapter_element, driver):
+    def extract_new_chapters(self, title, first_chapters, page_urls, stored, driver):
         """
-        Processes a single chapter element to extract its title and link.
+        Reads the chapter pages from the last one (the newest chapters) backwards, until a page holds a
+        chapter that is already stored, and merges them with the stored chapters.
 
         Args:
-            chapter_element (WebElement): The web element representing a chapter.
+            title (str): The book's title in all_books.
+            first_chapters (list): The (chapter title, chapter link) pairs of the first page.
+            page_urls (list): The URLs of pages 2 to N.
+            stored (dict): The book's stored chapters.
             driver (webdriver): The WebDriver instance for the thread.
 
         Returns:
-            tuple: A tuple containing the chapter title and link.
+            dict: The whole chapter list, or None if the merged list does not match the site's chapter count.
+        """
+        new_pages = []
+        for page_url in reversed(page_urls):
+            page = self.parse_chapter_page(self.chapter_fetcher.fetch(page_url, driver), page_url)
+            new_pages.insert(0, page)
+            if any(chapter_title in stored for chapter_title, _ in page):
+                break
+        else:
+            new_pages.insert(0, first_chapters)
+
+        chapters = self.chapter_sync.merge(stored, {chapter_title: chapter_link for page in new_pages for chapter_title, chapter_link in page})
+
+        # Every page but the last one is full
+        expected = len(first_chapters) * len(page_urls) + len(new_pages[-1]) if page_urls else len(first_chapters)
+        if len(chapters) != expected:
+            logger.info(f"{title}: {len(chapters)} chapters after merging, but the site lists {expected}. Reading every page.")
+            return None
+
+        logger.info(f"{title}: read {len(new_pages)} of {len(page_urls) + 1} chapter pages")
+        return chapters
+
+    @staticmethod
+    def chapter_page_urls(first_page, chapters_url):
         """
-        try:
-            number = self.get_element_text(By.CLASS_NAME, 'chapter-no', default_text='', element=chapter_element, driver=driver)
-            title = self.get_element_text(By.CLASS_NAME, 'chapter-title', default_text='', element=chapter_element, driver=driver)
-            chapter_title = f'{number} - {title}' if number else title
-            chapter_link = chapter_element.get_attribute('href')
-            return chapter_title, chapter_link
-        except Exception as e:
-            logger.error(f"Error processing chapter element: {e}")
-            return None, None
-    
+        Returns the URLs of chapter pages 2 to N, built from the pagination links of the first page.
+
+        Args:
+            first_page (BeautifulSoup): The first chapter page.
+            chapters_url (str): Its URL, to resolve relative links.
+
+        Returns:
+            list: The URLs, in page order. Empty if the book has a single page of chapters.
+        """
+        links = {}
+        for link in first_page.select('.pagination a[href], .PagedList-skipToLast a[href]'):
+            url = urljoin(chapters_url, link['href'])
+            match = PAGE_NUMBER_PATTERN.search(url)
+            if match:
+                links[int(match.group(1))] = url
+        if not links:
+            return []
+
+        # The "last page" link has the highest number; the others are built from the same URL
+        last_page = max(links)
+        template = links[last_page]
+        match = PAGE_NUMBER_PATTERN.search(template)
+        return [f'{template[:match.start(1)]}{page}{template[match.end(1):]}' for page in range(2, last_page + 1)]
+
+    @staticmethod
+    def parse_chapter_page(page, page_url):
+        """
+        Returns the (chapter title, chapter link) pairs of a chapter page, in page order.
+
+        Raises:
+            ValueError: If the page has no chapter list (e.g. the browser gave up before it loaded).
+        """
+        if page.select_one('ul.chapter-list') is None:
+            raise ValueError(f"No chapter list on {page_url}")
+        chapters = []
+        for link in page.select('ul.chapter-list a'):
+            # Whitespace collapsed the way the browser's element.text does
+            number, title = [
+                ' '.join(element.get_text().split()) if element else ''
+                for element in (link.select_one('.chapter-no'), link.select_one('.chapter-title'))
+            ]
+            chapters.append((f'{number} - {title}' if number else title, urljoin(page_url, link.get('href', ''))))
+        return chapters
+
     @staticmethod
     def parse_relative_date(time_str):
         """
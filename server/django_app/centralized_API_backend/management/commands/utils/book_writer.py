@@ -0,0 +1,263 @@
+import io
+import json
+import atexit
+import logging
+import threading
+from django.db import connection, transaction, DatabaseError
+from centralized_API_backend.management.commands.utils.genre_resolver import genre_resolver
+from centralized_API_backend.book_chapters import summarize_chapters
+from centralized_API_backend.chapter_parser import chapter_sort_key
+
+logger = logging.getLogger(__name__)
+
+# Number of books buffered before they are written to the database in one go
+BATCH_SIZE = 100
+
+# Columns of all_books written by the scrapers, in COPY order
+BOOK_COLUMNS = [
+    'title', 'novel_source', 'synopsis', 'author', 'updated_on', 'newest_chapter',
+    'image_url', 'rating', 'status', 'novel_type', 'followers', 'chapters',
+    'newest_chapter_link', 'newest_chapter_sort_key', 'chapter_count',
+]
+
+# Columns an upsert may change: everything but the primary key
+UPDATED_COLUMNS = BOOK_COLUMNS[2:]
+
+def copy_value(value):
+    """
+    Formats a value for COPY ... FROM STDIN (text format): NULL is \\N, and backslashes, tabs and newlines are escaped.
+    """
+    if value is None:
+        return '\\N'
+    return str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+
+def copy_rows(cursor, table, columns, rows):
+    """
+    Streams rows into a table with a single COPY statement.
+    """
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write('\t'.join(copy_value(value) for value in row))
+        buffer.write('\n')
+    buffer.seek(0)
+    cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", buffer)
+
+class BookWriter:
+    """
+    Buffers scraped books and writes them to all_books / all_books_genres in batches.
+
+    Writing one book used to take a dozen round-trips (upsert, delete the genre links, then a select and
+    insert per genre). A batch takes a fixed handful, however many books it holds: genre ids come from the
+    process-wide GenreResolver, then the books and their genre links are streamed with COPY into temporary
+    staging tables and merged into the real tables with set-based statements, all in one transaction.
+
+    Genre links are diffed against the staged ones rather than deleted and re-inserted, so a book whose
+    genres did not change leaves all_books_genres untouched (no dead tuples, no index churn).
+    Chapters are diffed into book_chapters the same way: chapters seen for the first time are inserted, and
+    chapters the site no longer lists are deleted, so the latest chapter read from book_chapters is never stale.
+    all_books.chapters is kept complete, since the book endpoints return it and reads of books not yet
+    backfilled fall back to it, but it is only rewritten when the chapter list changed: an unchanged
+    document keeps its TOAST storage, and a book with nothing new is not updated at all.
+
+    book_chapters and the chapter summary columns of all_books must exist (python manage.py backfill_book_chapters).
+
+    Scrapers call add(details, url) where they used to write the book, and flush(novel_source) once they are
+    done. A book that cannot be written is reported by flush(), so the scraper can count it as an error and keep
+    its page out of the validator cache (and the source's latest-updates watermark) until it is written.
+    Books are buffered and their failures reported per source: several scrapers share the writer when the
+    master scraper runs them in one process, and each must only write and hear about its own books.
+    Anything still buffered is also flushed when the process exits.
+    """
+
+    def __init__(self, batch_size=BATCH_SIZE):
+        self.batch_size = batch_size
+        # novel_source to the books buffered for it
+        self.buffers = {}
+        self.lock = threading.Lock()
+        # Only one batch is merged at a time, so concurrent flushes never wait on each other's row locks
+        self.flush_lock = threading.Lock()
+        # novel_source to {(title, novel_source): book page URL} of the books that could not be written, until flush() reports them
+        self.failed = {}
+
+    def add(self, details, url=None):
+        """
+        Queues a book for writing. Writes its source's buffer once it holds batch_size books.
+
+        Args:
+            details (dict): The book, as returned by the scrapers' scrape_book_details.
+            url (str, optional): The book's page, reported back by flush() if the book cannot be written.
+        """
+        title = details['title'].strip()
+        row = [
+            title,
+            details['novel_source'],
+            details['synopsis'],
+            details['author'],
+            details['updated_on'],
+            details['newest_chapter'],
+            details['image_url'],
+            details['rating'],
+            details['status'],
+            details['novel_type'],
+            details['followers'],
+            json.dumps(details['chapters']),
+            # Summary for the read endpoints, so they never have to load and parse the chapters document
+            *summarize_chapters(details['chapters']),
+        ]
+        genres = sorted({genre_name.strip().lower() for genre_name in details['genres']})
+
+        novel_source = details['novel_source']
+        with self.lock:
+            buffer = self.buffers.setdefault(novel_source, {})
+            # Keyed by the primary key, so a book scraped twice in a batch is only written once (the latest wins)
+            buffer[(title, novel_source)] = (row, genres, details['chapters'], url)
+            if len(buffer) < self.batch_size:
+                return
+            batch = self.buffers.pop(novel_source)
+        self.write(batch)
+
+    def flush(self, novel_source=None):
+        """
+        Writes the buffered books of a source.
+
+        Args:
+            novel_source (str, optional): The source to flush. Every source if None (e.g. at exit).
+
+        Returns:
+            dict: (title, novel_source) to book page URL (None if add() was not given one) of every book of the
+                source that could not be written since its previous flush. Each failure is only reported once.
+        """
+        with self.lock:
+            sources = list(self.buffers) if novel_source is None else [novel_source]
+            batches = [self.buffers.pop(source, None) for source in sources]
+        for batch in batches:
+            if batch:
+                self.write(batch)
+
+        failed = {}
+        with self.lock:
+            for source in (list(self.failed) if novel_source is None else [novel_source]):
+                failed.update(self.failed.pop(source, {}))
+        return failed
+
+    def write(self, batch):
+        with self.flush_lock:
+            try:
+                self.write_batch(batch)
+                logger.info(f"Wrote {len(batch)} books to the database")
+            except DatabaseError as e:
+                # One bad row (e.g. an unparsable date) fails the whole batch: retry book by book so the rest still gets written
+                logger.error(f"Writing a batch of {len(batch)} books failed, retrying them one by one: {e}")
+                for key, value in batch.items():
+                    try:
+                        self.write_batch({key: value})
+                    except DatabaseError as e:
+                        logger.error(f"Error writing {key[0]} ({key[1]}) to the database: {e}")
+                        with self.lock:
+                            self.failed.setdefault(key[1], {})[key] = value[3]
+
+    def write_batch(self, batch):
+        # Resolved before the batch transaction: new genres are committed on their own (see GenreResolver.resolve)
+        genre_ids = genre_resolver.resolve(genre_name for _, genres, _, _ in batch.values() for genre_name in genres)
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            # Temporary tables are never WAL-logged and disappear with the transaction
+            cursor.execute("""
+                CREATE TEMP TABLE staging_books (LIKE all_books INCLUDING DEFAULTS) ON COMMIT DROP;
+                CREATE TEMP TABLE staging_book_genres (title VARCHAR(255), novel_source VARCHAR(100), genre_id INTEGER) ON COMMIT DROP;
+                CREATE TEMP TABLE staging_chapters (title VARCHAR(255), novel_source VARCHAR(100), chapter TEXT, link TEXT, sort_key NUMERIC) ON COMMIT DROP;
+            """)
+            copy_rows(cursor, 'staging_books', BOOK_COLUMNS, (row for row, _, _, _ in batch.values()))
+            copy_rows(cursor, 'staging_book_genres', ['title', 'novel_source', 'genre_id'], (
+                (title, novel_source, genre_ids[genre_name])
+                for (title, novel_source), (_, genres, _, _) in batch.items()
+                for genre_name in genres
+            ))
+            copy_rows(cursor, 'staging_chapters', ['title', 'novel_source', 'chapter', 'link', 'sort_key'], (
+                (title, novel_source, chapter, link, chapter_sort_key(chapter))
+                for (title, novel_source), (_, _, chapters, _) in batch.items()
+                for chapter, link in chapters.items()
+            ))
+
+            cursor.execute(f"""
+                INSERT INTO all_books ({', '.join(BOOK_COLUMNS)})
+                SELECT {', '.join(BOOK_COLUMNS)} FROM staging_books
+                ON CONFLICT (title, novel_source)
+                DO UPDATE SET
+                    synopsis = EXCLUDED.synopsis,
+                    author = EXCLUDED.author,
+                    updated_on = EXCLUDED.updated_on,
+                    newest_chapter = EXCLUDED.newest_chapter,
+                    image_url = EXCLUDED.image_url,
+                    rating = EXCLUDED.rating,
+                    status = EXCLUDED.status,
+                    novel_type = EXCLUDED.novel_type,
+                    followers = EXCLUDED.followers,
+                    -- Assigning the stored value keeps its TOAST pointer, so an unchanged chapter list is not rewritten
+                    chapters = CASE WHEN all_books.chapters IS DISTINCT FROM EXCLUDED.chapters
+                                    THEN EXCLUDED.chapters ELSE all_books.chapters END,
+                    newest_chapter_link = EXCLUDED.newest_chapter_link,
+                    newest_chapter_sort_key = EXCLUDED.newest_chapter_sort_key,
+                    chapter_count = EXCLUDED.chapter_count
+                WHERE ({', '.join(f'all_books.{column}' for column in UPDATED_COLUMNS)})
+                    IS DISTINCT FROM ({', '.join(f'EXCLUDED.{column}' for column in UPDATED_COLUMNS)})
+            """)
+
+            # Links the books no longer have
+            cursor.execute("""
+                DELETE FROM all_books_genres abg
+                USING staging_books sb
+                WHERE abg.allbooks_title = sb.title
+                  AND abg.allbooks_novel_source = sb.novel_source
+                  AND NOT EXISTS (
+                      SELECT 1 FROM staging_book_genres sbg
+                      WHERE sbg.title = abg.allbooks_title
+                        AND sbg.novel_source = abg.allbooks_novel_source
+                        AND sbg.genre_id = abg.genre_id
+                  )
+            """)
+            removed_links = cursor.rowcount
+
+            # Links the books did not have yet
+            cursor.execute("""
+                INSERT INTO all_books_genres (genre_id, allbooks_title, allbooks_novel_source)
+                SELECT sbg.genre_id, sbg.title, sbg.novel_source
+                FROM staging_book_genres sbg
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM all_books_genres abg
+                    WHERE abg.allbooks_title = sbg.title
+                      AND abg.allbooks_novel_source = sbg.novel_source
+                      AND abg.genre_id = sbg.genre_id
+                )
+            """)
+            added_links = cursor.rowcount
+
+            # Chapters the books no longer list
+            cursor.execute("""
+                DELETE FROM book_chapters bc
+                USING staging_books sb
+                WHERE bc.book_title = sb.title
+                  AND bc.book_novel_source = sb.novel_source
+                  AND NOT EXISTS (
+                      SELECT 1 FROM staging_chapters sc
+                      WHERE sc.title = bc.book_title
+                        AND sc.novel_source = bc.book_novel_source
+                        AND sc.chapter = bc.chapter
+                  )
+            """)
+            removed_chapters = cursor.rowcount
+
+            # New chapters are appended; existing rows are only rewritten when their link (or parsed sort key) changed
+            cursor.execute("""
+                INSERT INTO book_chapters (book_title, book_novel_source, chapter, link, sort_key)
+                SELECT title, novel_source, chapter, link, sort_key FROM staging_chapters
+                ON CONFLICT (book_title, book_novel_source, chapter)
+                DO UPDATE SET link = EXCLUDED.link, sort_key = EXCLUDED.sort_key
+                WHERE book_chapters.link IS DISTINCT FROM EXCLUDED.link
+                   OR book_chapters.sort_key IS DISTINCT FROM EXCLUDED.sort_key
+            """)
+
+        logger.debug(f"Genre links: {added_links} added, {removed_links} removed. Chapters: {removed_chapters} removed")
+
+book_writer = BookWriter()
+atexit.register(book_writer.flush)
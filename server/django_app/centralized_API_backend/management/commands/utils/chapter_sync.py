@@ -0,0 +1,106 @@
+import os
+import json
+import time
+import logging
+from django.db import connection
+from centralized_API_backend.chapter_parser import sort_chapters
+from centralized_API_backend.management.commands.utils.state_store import StateStore
+
+# Set SCRAPER_FULL_CHAPTERS=1 to re-read every chapter list in full
+FULL_CHAPTERS_ENV = "SCRAPER_FULL_CHAPTERS"
+
+# Days between two full reads of a book's chapter list
+RESYNC_DAYS_ENV = "SCRAPER_CHAPTER_RESYNC_DAYS"
+DEFAULT_RESYNC_DAYS = 7
+
+CHAPTER_SYNC_NAMESPACE = "chapter_sync"
+
+class ChapterSync:
+    """
+    Incremental chapter lists for sources whose chapter list is long to read (several pages, "load more").
+
+    When a book got new chapters, only the newest end of its chapter list needs reading: the scraper reads
+    from the newest chapter backwards until it reaches one that is already stored, and merges what it read
+    with the stored list. Chapters the site renamed, re-linked or removed deep in the list would never be
+    seen that way, so each book's list is still read in full every SCRAPER_CHAPTER_RESYNC_DAYS days, and
+    whenever the scraper notices the merged list does not match the site.
+
+    Usage:
+        sync = ChapterSync('Light Novel Pub', logger=logger)
+        stored = sync.stored_chapters(title)
+        if stored is None:
+            chapters = <full chapter list>
+            sync.synced(title)
+        else:
+            new_chapters = <chapters from the newest end, down to the first one in stored>
+            chapters = sync.merge(stored, new_chapters)
+
+    Sources listing their newest chapter first pass newest_first=True to both stored_chapters and merge.
+    """
+
+    def __init__(self, novel_source, logger=None, store=None):
+        """
+        Args:
+            novel_source (str): The source's novel_source in all_books.
+            logger (logging.Logger, optional): The scraper's logger.
+            store (StateStore, optional): Where the time of each book's last full read is persisted.
+        """
+        self.novel_source = novel_source
+        self.logger = logger or logging.getLogger(__name__)
+        self.store = store or StateStore(CHAPTER_SYNC_NAMESPACE)
+        self.resync_interval = float(os.environ.get(RESYNC_DAYS_ENV, DEFAULT_RESYNC_DAYS)) * 24 * 60 * 60
+
+    def key(self, title):
+        return f'{self.novel_source}|{title}'
+
+    def stored_chapters(self, title, newest_first=False):
+        """
+        Returns the book's stored chapters to update incrementally, or None if its list must be read in full:
+        the book is new, a full read is due, or SCRAPER_FULL_CHAPTERS=1.
+
+        all_books.chapters is JSONB, which does not keep the order the chapters were written in, so the stored
+        chapters are put back in chapter order (see chapter_parser.sort_chapters) before they are merged.
+
+        Args:
+            title (str): The book's title in all_books.
+            newest_first (bool): Whether the source lists its newest chapter first, like merge().
+        """
+        if os.environ.get(FULL_CHAPTERS_ENV) == '1':
+            return None
+        last_full = self.store.get(self.key(title))
+        if last_full is None or time.time() - last_full >= self.resync_interval:
+            return None
+
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT chapters FROM all_books WHERE title = %s AND novel_source = %s", [title, self.novel_source])
+            row = cursor.fetchone()
+        if not row or not row[0]:
+            return None
+        chapters = json.loads(row[0]) if isinstance(row[0], str) else row[0]
+        return sort_chapters(chapters, reverse=newest_first)
+
+    def synced(self, title):
+        """
+        Records that the book's chapter list was just read in full.
+        """
+        self.store.set(self.key(title), time.time())
+
+    @staticmethod
+    def merge(stored, new_chapters, newest_first=False):
+        """
+        Merges the chapters read from the newest end of the list into the stored ones, keeping the site's order.
+
+        Args:
+            stored (dict): The stored chapters, chapter label to link.
+            new_chapters (dict): The chapters just read. They win over stored ones with the same label.
+            newest_first (bool): Whether the source lists its newest chapter first.
+
+        Returns:
+            dict: The whole chapter list.
+        """
+        if not newest_first:
+            return {**stored, **new_chapters}
+        merged = dict(new_chapters)
+        for chapter, link in stored.items():
+            merged.setdefault(chapter, link)
+        return merged
@@ -0,0 +1,153 @@
+import os
+import re
+import shutil
+import threading
+import subprocess
+from webdriver_manager.chrome import ChromeDriverManager
+from webdriver_manager.core.os_manager import ChromeType
+from centralized_API_backend.management.commands.utils.state_store import StateStore
+
+'''
+    Provisions the chromedriver binary and, optionally, a long-lived browser service.
+
+    ChromeDriverManager().install() looks the matching driver version up over the network on every call,
+    and every DriverPool used to call it once per browser. The resolved binary is now kept in the state
+    store, keyed by the installed Chrome version: later runs reuse it without any lookup, and it is only
+    resolved again when Chrome is upgraded (or the binary disappears).
+
+    With SCRAPER_BROWSER_SERVICE set (e.g. http://localhost:9515), DriverPool attaches to an already running
+    WebDriver server instead of spawning a chromedriver per browser. `python manage.py browser_service`
+    starts one; a Selenium Grid / standalone-chrome container works too.
+
+    A WebDriver server still launches a new Chrome for every session. `browser_service --browsers N` also
+    starts N headless Chromes ahead of time, each with its own --remote-debugging-port; with their addresses
+    in SCRAPER_BROWSER_DEBUGGERS, each driver claims a free one and its session attaches to that running
+    browser (the debuggerAddress option) instead of launching one. Quitting an attached session leaves the
+    browser running for the next driver.
+'''
+
+CHROMEDRIVER_NAMESPACE = "chromedriver"
+
+# Skips the resolution entirely: a chromedriver binary to use as is
+CHROMEDRIVER_PATH_ENV = "CHROMEDRIVER_PATH"
+
+# URL of a running WebDriver server the drivers attach to
+BROWSER_SERVICE_ENV = "SCRAPER_BROWSER_SERVICE"
+
+# Comma-separated host:port DevTools addresses of browsers already running for the browser service
+BROWSER_DEBUGGERS_ENV = "SCRAPER_BROWSER_DEBUGGERS"
+
+DEFAULT_SERVICE_PORT = 9515
+DEFAULT_DEBUGGING_PORT = 9222
+
+# Where Chrome is looked for, in order
+CHROME_BINARIES = [
+    'google-chrome', 'google-chrome-stable', 'chromium', 'chromium-browser', 'chrome',
+    '/Applications/Google Chrome.app/Contents/MacOS/Google Chrome',
+    '/Applications/Chromium.app/Contents/MacOS/Chromium',
+]
+
+VERSION_PATTERN = re.compile(r'(\d+(?:\.\d+)+)')
+
+_resolved_path = None
+_resolve_lock = threading.Lock()
+
+# Debugger addresses with a session attached, shared by every DriverPool of the process
+_claimed_debuggers = set()
+_debuggers_lock = threading.Lock()
+
+def get_browser_service_url():
+    """
+    Returns the URL of the shared browser service, or None if drivers should be started locally.
+    """
+    return os.environ.get(BROWSER_SERVICE_ENV) or None
+
+def get_debugger_addresses():
+    """
+    Returns the DevTools addresses of the browsers the browser service started ahead of time, e.g. ['127.0.0.1:9222'].
+    """
+    return [address.strip() for address in os.environ.get(BROWSER_DEBUGGERS_ENV, '').split(',') if address.strip()]
+
+def claim_debugger_address():
+    """
+    Claims a pre-started browser no session is attached to yet.
+
+    Returns:
+        str: Its debugger address, or None if every one is taken (the session then launches its own browser).
+    """
+    with _debuggers_lock:
+        for address in get_debugger_addresses():
+            if address not in _claimed_debuggers:
+                _claimed_debuggers.add(address)
+                return address
+    return None
+
+def release_debugger_address(address):
+    """
+    Makes a pre-started browser available again once the session attached to it quit.
+    """
+    with _debuggers_lock:
+        _claimed_debuggers.discard(address)
+
+def chrome_binaries():
+    """
+    Yields the paths of the Chrome (or Chromium) binaries found, in CHROME_BINARIES order.
+    """
+    for binary in CHROME_BINARIES:
+        path = shutil.which(binary) or (binary if os.path.isfile(binary) else None)
+        if path:
+            yield path
+
+def detect_chrome_version():
+    """
+    Returns the version of the installed Chrome (or Chromium), e.g. '126.0.6478.126', or None if none was found.
+    """
+    for path in chrome_binaries():
+        try:
+            output = subprocess.check_output([path, '--version'], stderr=subprocess.DEVNULL, timeout=10)
+        except (OSError, subprocess.SubprocessError):
+            continue
+        match = VERSION_PATTERN.search(output.decode('utf-8', errors='replace'))
+        if match:
+            return match.group(1)
+    return None
+
+def install_chromedriver():
+    try:
+        return ChromeDriverManager().install()
+    except Exception as e:
+        print(f"Error installing ChromeDriver: {str(e)}")
+        # Fallback for ARM Macs
+        return ChromeDriverManager(chrome_type=ChromeType.CHROMIUM).install()
+
+def resolve_chromedriver(refresh=False):
+    """
+    Returns the path of a chromedriver binary matching the installed Chrome.
+
+    Resolved once per process, and cached across runs in the state store. CHROMEDRIVER_PATH overrides it.
+
+    Args:
+        refresh (bool): Ignore the cached binary and resolve it again, e.g. after it failed to start a session.
+    """
+    global _resolved_path
+    override = os.environ.get(CHROMEDRIVER_PATH_ENV)
+    if override:
+        return override
+
+    with _resolve_lock:
+        if _resolved_path and not refresh:
+            return _resolved_path
+
+        chrome_version = detect_chrome_version()
+        store = StateStore(CHROMEDRIVER_NAMESPACE)
+        # Without a detectable Chrome, the cached binary is trusted until it fails (see DriverPool.create_webdriver_instance)
+        key = chrome_version or 'unknown'
+        cached = None if refresh else store.get(key)
+        if cached and os.path.isfile(cached):
+            _resolved_path = cached
+            return _resolved_path
+
+        print(f"Resolving ChromeDriver for Chrome {chrome_version or '(version unknown)'}")
+        _resolved_path = install_chromedriver()
+        store.set(key, _resolved_path)
+        return _resolved_path
@@ -0,0 +1,301 @@
+import os
+import time
+import types
+import atexit
+import logging
+import threading
+import urllib.parse
+from contextlib import contextmanager
+from centralized_API_backend.management.commands.utils.state_store import StateStore
+
+logger = logging.getLogger(__name__)
+
+# Environment variable the master scraper uses to hand each scraper process its share
+# of the global in-flight request budget when running sources in parallel.
+WORKER_BUDGET_ENV = "SCRAPER_MAX_WORKERS"
+
+def get_worker_budget(default):
+    """
+    Returns the number of concurrent workers a scraper is allowed to use.
+
+    When the master scraper runs several sources at the same time, it splits its global
+    request budget between them and passes each process its share through SCRAPER_MAX_WORKERS.
+    A scraper never goes above its own hand-tuned default, so sources that are pinned low
+    (e.g. FlameComics at 1 worker to avoid bans) stay pinned.
+
+    Args:
+        default (int): The number of workers the scraper would use on its own.
+
+    Returns:
+        int: The number of workers to use (always at least 1).
+    """
+    budget = os.environ.get(WORKER_BUDGET_ENV)
+    if not budget:
+        return default
+    try:
+        return max(1, min(default, int(budget)))
+    except ValueError:
+        return default
+
+# Adaptive (AIMD) per-host concurrency
+#
+# Instead of hand-tuning a thread count per source, every host gets a concurrency limit that is
+# learned while scraping: each successful request made while the host was at its limit raises it a
+# little (additive increase, roughly +1 per round of requests), and any sign of overload (403/429/503,
+# a timeout, or latency drifting far above the host's usual latency) halves it (multiplicative decrease).
+# Requests made below the limit leave it alone: the limit was not what held the scraper back, so
+# they say nothing about whether the host would take more. The learned limit is saved
+# per host and used as the starting point of the next run.
+#
+# A full page GET, an AJAX call and a browser navigation (which also loads scripts and renders) take
+# very different times on the same host, so latency is compared per request kind. 304 Not Modified
+# answers carry no body and say nothing about how long a real page takes: they raise the limit but
+# are left out of the latency signal.
+
+# Responses that mean the server wants us to slow down (403 is how the anti-bot front ends of several sources say it)
+OVERLOAD_STATUSES = {403, 429, 503}
+
+# Bounds for the learned limit of a single host
+MIN_LIMIT = 1
+MAX_LIMIT = 32
+
+# Limit used for a host we have never scraped before when the scraper does not suggest one
+DEFAULT_INITIAL_LIMIT = 4
+
+# Ceiling for hosts scraped through Selenium: each unit of their limit is a Chrome instance in the DriverPool
+BROWSER_MAX_LIMIT = 4
+
+# Request kinds with their own latency baseline
+KIND_PAGE = 'page'
+KIND_AJAX = 'ajax'
+KIND_BROWSER = 'browser'
+
+# Back off when the smoothed latency of a request kind exceeds this multiple of its baseline
+LATENCY_TOLERANCE = 3.0
+LATENCY_SMOOTHING = 0.2
+
+# The baseline follows new minimums at once, and drifts up by this fraction of the gap on slower answers,
+# so one lucky fast answer (or a host that got slower for good) does not skew it forever
+BASELINE_DECAY = 0.01
+
+# Minimum number of seconds between two decreases, so a burst of failures from requests that were
+# already in flight only halves the limit once
+DECREASE_COOLDOWN = 5.0
+
+CONCURRENCY_STATE_NAMESPACE = "concurrency"
+
+def get_host(url):
+    """
+    Returns the host a URL belongs to (e.g. 'flamecomics.xyz'). Bare host names are returned unchanged.
+    """
+    return urllib.parse.urlsplit(url).netloc or url
+
+def is_timeout(exception):
+    """
+    Checks if an exception is a timeout, whichever library raised it
+    (requests.Timeout, asyncio.TimeoutError, selenium TimeoutException, ...).
+    """
+    return isinstance(exception, TimeoutError) or 'Timeout' in type(exception).__name__
+
+class AdaptiveLimit:
+    """
+    The AIMD state of a single host. Not thread-safe on its own: the controller guards it with its condition.
+    """
+
+    def __init__(self, limit, max_limit=MAX_LIMIT, baseline_latency=None):
+        self.max_limit = max(MIN_LIMIT, max_limit)
+        self.limit = float(min(max(limit, MIN_LIMIT), self.max_limit))
+        # Request kind to latency baseline / smoothed latency, in seconds
+        self.baseline_latency = dict(baseline_latency or {})
+        self.smoothed_latency = {}
+        self.last_decrease = 0.0
+        self.in_flight = 0
+        self.condition = threading.Condition()
+
+    @property
+    def current(self):
+        return max(MIN_LIMIT, int(self.limit))
+
+    def on_success(self, latency=None, kind=KIND_PAGE, saturated=True):
+        if latency is not None:
+            baseline = self.baseline_latency.get(kind)
+            if baseline is None or latency < baseline:
+                baseline = latency
+            else:
+                baseline += BASELINE_DECAY * (latency - baseline)
+            self.baseline_latency[kind] = baseline
+
+            smoothed = self.smoothed_latency.get(kind)
+            smoothed = latency if smoothed is None else smoothed + LATENCY_SMOOTHING * (latency - smoothed)
+            self.smoothed_latency[kind] = smoothed
+
+            # Fast answers but a growing queue on the server side: treat it as the first sign of overload
+            if baseline and smoothed > LATENCY_TOLERANCE * baseline:
+                self.on_overload()
+                return
+
+        if saturated:
+            self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+
+    def cap(self, max_limit):
+        """
+        Lowers the host's ceiling (never raises it), bringing the limit down with it.
+        """
+        self.max_limit = max(MIN_LIMIT, min(self.max_limit, max_limit))
+        self.limit = min(self.limit, float(self.max_limit))
+
+    def saturated(self):
+        """
+        Whether the requests in flight (including the caller's) use up the whole limit.
+        """
+        return self.in_flight >= self.current
+
+    def on_overload(self):
+        now = time.monotonic()
+        if now - self.last_decrease < DECREASE_COOLDOWN:
+            return
+        self.last_decrease = now
+        self.limit = max(MIN_LIMIT, self.limit / 2)
+        # Start measuring again from the new, lower load
+        self.smoothed_latency = dict(self.baseline_latency)
+
+class AdaptiveConcurrencyController:
+    """
+    Keeps one AdaptiveLimit per host and persists the learned limits between runs.
+
+    Blocking code (the shared HTTP client, Selenium navigation) wraps each request in slot(url),
+    which waits while the host is at its limit. The asyncio engine does its own waiting and only
+    uses get_limit() and record().
+    """
+
+    def __init__(self, store=None):
+        self.store = store
+        self.limits = {}
+        self.lock = threading.Lock()
+
+    def get_store(self):
+        if self.store is None:
+            self.store = StateStore(CONCURRENCY_STATE_NAMESPACE)
+        return self.store
+
+    def get_state(self, url, initial=None, max_limit=None):
+        """
+        Returns the AdaptiveLimit of the URL's host, creating it from the saved state on first use.
+
+        Args:
+            url (str): Any URL of the host (or the bare host name).
+            initial (int, optional): Starting limit if the host has never been scraped.
+            max_limit (int, optional): Ceiling for the host's limit (e.g. the master scraper's worker budget, or
+                BROWSER_MAX_LIMIT). Applied even if the host is already in use, and only ever lowers the ceiling.
+        """
+        host = get_host(url)
+        with self.lock:
+            state = self.limits.get(host)
+            if state is None:
+                try:
+                    saved = self.get_store().get(host) or {}
+                except Exception as e:
+                    logger.warning(f"Could not load the saved concurrency limit of {host}: {e}")
+                    saved = {}
+                state = AdaptiveLimit(
+                    saved.get('limit', initial or DEFAULT_INITIAL_LIMIT),
+                    max_limit=max_limit or get_worker_budget(MAX_LIMIT),
+                    baseline_latency=saved.get('baseline_latency'),
+                )
+                self.limits[host] = state
+        if max_limit:
+            with state.condition:
+                state.cap(max_limit)
+        return state
+
+    def get_limit(self, url, initial=None, max_limit=None):
+        return self.get_state(url, initial, max_limit).current
+
+    def suggest_workers(self, url, default, max_workers=None):
+        """
+        Returns how many workers (threads, browser windows) a scraper should start for a host:
+        the learned limit plus one, so the limit still has room to grow during this run.
+
+        Args:
+            url (str): Any URL of the host.
+            default (int): The number of workers to use for a host that has never been scraped.
+            max_workers (int, optional): Hard cap on both the workers and the host's limit, e.g. BROWSER_MAX_LIMIT
+                for the Selenium scrapers, or 1 for sources that ban faster scraping.
+        """
+        state = self.get_state(url, initial=default, max_limit=max_workers)
+        return min(state.max_limit, MAX_LIMIT, state.current + 1)
+
+    def record(self, url, latency=None, status=None, exception=None, kind=KIND_PAGE, saturated=True):
+        """
+        Feeds the outcome of one request into the host's limit.
+
+        Args:
+            url (str): The requested URL.
+            latency (float, optional): Seconds the request took.
+            status (int, optional): The HTTP status code, if known.
+            exception (Exception, optional): The error the request failed with, if any.
+            kind (str): KIND_PAGE, KIND_AJAX or KIND_BROWSER: which latency baseline the request is compared to.
+            saturated (bool): Whether the host was at its limit when the request started (see AdaptiveLimit.saturated).
+                Only then may a success raise the limit.
+        """
+        state = self.get_state(url)
+        with state.condition:
+            if (status in OVERLOAD_STATUSES) or (exception is not None and is_timeout(exception)):
+                state.on_overload()
+            elif exception is None and (status is None or status < 400):
+                state.on_success(None if status == 304 else latency, kind, saturated)
+            # Other errors (404, DNS failures, ...) say nothing about load
+            state.condition.notify_all()
+
+    @contextmanager
+    def slot(self, url, kind=KIND_PAGE):
+        """
+        Waits until the URL's host is below its limit, then holds one of its slots for the duration of the block.
+
+        The block can set `.status` on the yielded object; latency and exceptions are recorded automatically,
+        as a request of the given kind (see record).
+
+        Example:
+            with concurrency_controller.slot(url) as request:
+                response = session.get(url)
+                request.status = response.status_code
+        """
+        state = self.get_state(url)
+        with state.condition:
+            while state.in_flight >= state.current:
+                state.condition.wait()
+            state.in_flight += 1
+            saturated = state.saturated()
+
+        request = types.SimpleNamespace(status=None)
+        started = time.monotonic()
+        try:
+            yield request
+        except Exception as e:
+            with state.condition:
+                state.in_flight -= 1
+            self.record(url, exception=e, kind=kind)
+            raise
+        else:
+            with state.condition:
+                state.in_flight -= 1
+            self.record(url, latency=time.monotonic() - started, status=request.status, kind=kind, saturated=saturated)
+
+    def save(self):
+        """
+        Persists the learned limit of every host used by this process.
+        """
+        with self.lock:
+            values = {
+                host: {'limit': round(state.limit, 2), 'baseline_latency': state.baseline_latency}
+                for host, state in self.limits.items()
+            }
+        if not values:
+            return
+        try:
+            self.get_store().set_many(values)
+        except Exception as e:
+            logger.warning(f"Could not save the learned concurrency limits: {e}")
+
+concurrency_controller = AdaptiveConcurrencyController()
+atexit.register(concurrency_controller.save)
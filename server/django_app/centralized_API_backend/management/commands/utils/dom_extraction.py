@@ -0,0 +1,96 @@
+from collections import namedtuple
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
+from centralized_API_backend.management.commands.utils.waits import DEFAULT_TIMEOUT, POLL_FREQUENCY
+
+'''
+    Reads many values off a page with a single execute_script call.
+
+    Every element.text, get_attribute() or find_element() is one WebDriver round-trip, so reading a
+    2,000-chapter list element by element costs thousands of them. extract() runs one JavaScript snippet
+    that walks the DOM in the browser and returns everything as JSON in a single round-trip.
+
+    What to read is described with Fields:
+
+        extract(driver, {
+            'rating': Field('.post-total-rating .score'),
+            'genres': Field('.genres-content a', many=True),
+            'chapters': Field('ul.version-chap a', many=True, fields={'label': Field(None), 'url': Field(None, 'href')}),
+        })
+'''
+
+# Field attribute for the element's rendered text, the equivalent of Selenium's element.text
+TEXT = 'text'
+
+# selector: CSS selector, relative to the enclosing row (None for the row element itself).
+# attribute: TEXT, or a DOM property / attribute name ('href', 'src', 'textContent', ...). Like Selenium's
+#            get_attribute, properties win, so links and image sources come back as absolute URLs.
+# many: Read every match as a list instead of only the first match (None if there is none).
+# fields: Read each match as a row: a dict of sub-fields, keyed like this dict.
+Field = namedtuple('Field', ['selector', 'attribute', 'many', 'fields'], defaults=[TEXT, False, None])
+
+EXTRACT_SCRIPT = """
+    const read = (scope, [selector, attribute, many, fields]) => {
+        const targets = selector ? Array.from(scope.querySelectorAll(selector)) : [scope];
+        const value = (target) => {
+            if (fields) {
+                const row = {};
+                for (const name in fields) row[name] = read(target, fields[name]);
+                return row;
+            }
+            if (attribute === 'text') return target.innerText.trim();
+            const property = target[attribute];
+            if (typeof property === 'string') return property.trim();
+            return target.getAttribute(attribute);
+        };
+        if (many) return targets.map(value);
+        return targets.length ? value(targets[0]) : null;
+    };
+    const [fields] = arguments;
+    const result = {};
+    for (const name in fields) result[name] = read(document, fields[name]);
+    return result;
+"""
+
+def extract(driver, fields, wait_for=None, timeout=DEFAULT_TIMEOUT):
+    """
+    Reads the given fields off the current page in one execute_script call.
+
+    Args:
+        driver (webdriver): The WebDriver instance.
+        fields (dict): Name to Field.
+        wait_for (str, optional): CSS selector to wait for first. The page is read anyway if it never shows up.
+        timeout (float): How long to wait for wait_for, in seconds.
+
+    Returns:
+        dict: Name to value: a string (or None if nothing matched), a list for many fields, dicts for row fields.
+    """
+    if wait_for:
+        try:
+            WebDriverWait(driver, timeout, poll_frequency=POLL_FREQUENCY).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, wait_for))
+            )
+        except TimeoutException:
+            pass
+    return driver.execute_script(EXTRACT_SCRIPT, fields)
+
+def extract_rows(driver, row_selector, fields, timeout=DEFAULT_TIMEOUT):
+    """
+    Reads one dict of fields per element matching row_selector, waiting for the first row to appear.
+
+    Returns:
+        list: The rows, in page order. Empty if no row showed up within the timeout.
+    """
+    return extract(driver, {'rows': Field(row_selector, many=True, fields=fields)}, wait_for=row_selector, timeout=timeout)['rows']
+
+def extract_links(driver, selector, timeout=DEFAULT_TIMEOUT):
+    """
+    Reads the text and href of every link matching selector.
+
+    Returns:
+        list: (text, href) tuples, in page order.
+    """
+    rows = extract_rows(driver, selector, {'text': Field(None), 'href': Field(None, 'href')}, timeout=timeout)
+    return [(row['text'], row['href']) for row in rows]
@@ -1,72 +1,381 @@
+import time
 import threading
-from queue import Queue
+from concurrent.futures import ThreadPoolExecutor
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
-from webdriver_manager.core.os_manager import ChromeType
-import subprocess
+from selenium.webdriver.chromium.remote_connection import ChromiumRemoteConnection
+from selenium.common.exceptions import SessionNotCreatedException
+from centralized_API_backend.management.commands.utils.chromedriver import (
+    resolve_chromedriver, get_browser_service_url, claim_debugger_address, release_debugger_address,
+)
+
+try:
+    import psutil
+except ImportError:
+    # Without psutil, drivers are only recycled by page count
+    psutil = None
+
+# Requests the scrapers never need: we only read DOM text and hrefs. Stylesheets are kept on purpose,
+# since Selenium's element.text and clickability checks depend on what CSS makes visible.
+BLOCKED_URL_PATTERNS = [
+    # Images, media and fonts
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.avif', '*.svg', '*.ico',
+    '*.mp4', '*.webm', '*.mp3',
+    '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot',
+    # Ads and analytics
+    '*googlesyndication.com*', '*doubleclick.net*', '*googletagmanager.com*', '*google-analytics.com*',
+    '*googletagservices.com*', '*adservice.google.*', '*amazon-adsystem.com*', '*adnxs.com*',
+    '*taboola.com*', '*outbrain.com*', '*scorecardresearch.com*', '*quantserve.com*',
+    '*facebook.net*', '*hotjar.com*', '*disqus.com*', '*cloudflareinsights.com*', '*histats.com*',
+]
+
+# Chrome content settings: 2 = block
+BLOCKED_CONTENT_PREFS = {
+    'profile.managed_default_content_settings.images': 2,
+    'profile.default_content_setting_values.notifications': 2,
+    'profile.default_content_setting_values.geolocation': 2,
+    'profile.default_content_setting_values.media_stream': 2,
+}
+
+# A driver is replaced by a fresh one after this many checkouts, or once its browser uses more memory than this
+DRIVER_MAX_PAGES = 200
+DRIVER_MAX_RSS_MB = 1024
+
+# How long get_driver waits for a free driver, in seconds
+CHECKOUT_TIMEOUT = 600
+
+# Wide enough for the sites' desktop layouts (their mobile breakpoints are below 1000px)
+WINDOW_SIZE = '1280,800'
+
+CHROME_ARGUMENTS = ['--headless=new', '--no-sandbox', '--disable-dev-shm-usage', '--disable-gpu']
+# The lightweight profile (block_resources), also used by the browsers the browser service starts ahead of time
+LIGHTWEIGHT_CHROME_ARGUMENTS = [
+    f'--window-size={WINDOW_SIZE}', '--blink-settings=imagesEnabled=false', '--mute-audio',
+    '--disable-extensions', '--disable-background-networking',
+]
+
+def execute_cdp(driver, cmd, params):
+    """
+    Runs a DevTools protocol command on a local or a remote (browser service) Chrome driver.
+    """
+    if hasattr(driver, 'execute_cdp_cmd'):
+        return driver.execute_cdp_cmd(cmd, params)
+    return driver.execute('executeCdpCommand', {'cmd': cmd, 'params': params})['value']
+
+def get_rss_mb(driver):
+    """
+    Returns the memory used by a driver's chromedriver and Chrome processes in MB, or None if it cannot be measured.
+    """
+    process = getattr(getattr(driver, 'service', None), 'process', None)
+    if psutil is None or process is None:
+        return None
+    try:
+        root = psutil.Process(process.pid)
+        return sum(p.memory_info().rss for p in [root, *root.children(recursive=True)]) / (1024 * 1024)
+    except psutil.Error:
+        return None
 
 class DriverPool:
-    def __init__(self, size):
-        self.available_drivers = Queue()
-        self.lock = threading.Lock()
+    """
+    A pool of headless Chrome instances shared by a scraper's threads.
+
+    Drivers are created on demand, outside the pool's lock, so several threads starting at once launch
+    their browsers in parallel, and a run that only needs one browser (or none, e.g. when every page is
+    fetched over HTTP) never starts the others. warm_up() starts them all ahead of time instead.
+    Every checkout health-checks the driver and replaces it if it crashed or stopped answering. A driver
+    is recycled after max_pages checkouts, or once its Chrome processes use more than max_rss_mb, so
+    memory does not keep growing over long runs. A checkout waits at most checkout_timeout seconds for a free driver.
+    """
+
+    def __init__(self, size, block_resources=True, max_pages=DRIVER_MAX_PAGES, max_rss_mb=DRIVER_MAX_RSS_MB,
+                 checkout_timeout=CHECKOUT_TIMEOUT, warm_up=False):
+        """
+        Args:
+            size (int): Maximum number of browsers.
+            block_resources (bool): Use the lightweight profile: no images, media, fonts, ads or trackers,
+                a smaller window, and pages handed back once their DOM is ready.
+            max_pages (int): Checkouts after which a driver is replaced by a fresh one.
+            max_rss_mb (int): Memory (RSS of chromedriver and its Chrome processes) above which a driver is replaced.
+                Only checked when psutil is installed.
+            checkout_timeout (float): Seconds get_driver waits for a free driver before raising TimeoutError.
+            warm_up (bool): Start all the browsers in the background right away instead of on first use.
+        """
+        self.size = max(1, size)
+        self.block_resources = block_resources
+        self.max_pages = max_pages
+        self.max_rss_mb = max_rss_mb
+        self.checkout_timeout = checkout_timeout
+
+        self.condition = threading.Condition()
+        self.idle = []
+        # Drivers alive or being created, counted against size
+        self.total = 0
+        self.pages = {}
+        self.checked_out_at = {}
+        # Drivers attached to a browser the browser service started ahead of time, and its debugger address
+        self.debugger_addresses = {}
+        self.closed = False
 
-        # Get Chrome version
+        self.started_at = time.monotonic()
+        self.stats_counters = {'checkouts': 0, 'wait_time': 0.0, 'max_wait': 0.0, 'busy_time': 0.0, 'created': 0, 'restarts': 0, 'recycled': 0, 'timeouts': 0}
+
+        if warm_up:
+            threading.Thread(target=self.warm_up, daemon=True).start()
+
+    def warm_up(self):
+        """
+        Creates every driver the pool does not have yet, in parallel.
+        """
+        with self.condition:
+            missing = self.size - self.total
+            self.total += missing
+        if missing <= 0:
+            return
+        with ThreadPoolExecutor(max_workers=missing) as executor:
+            for driver in executor.map(self.try_create, range(missing)):
+                with self.condition:
+                    closed = self.closed
+                    if driver is None or closed:
+                        # Give the slot back: get_driver will try to create it again when needed
+                        self.total -= 1
+                    else:
+                        self.idle.append(driver)
+                    self.condition.notify()
+                if driver is not None and closed:
+                    self.discard(driver)
+
+    def try_create(self, _=None):
         try:
-            chrome_version = subprocess.check_output(
-                ['/Applications/Google Chrome.app/Contents/MacOS/Google Chrome', '--version']
-            )
-            chrome_version = chrome_version.decode('utf-8').strip().split()[-1]
-            print(f"Detected Chrome version: {chrome_version}")
-        except Exception as e:
-            print(f"Warning: Could not detect Chrome version: {str(e)}")
+            return self.create()
+        except Exception:
+            return None
+
+    def create(self):
+        driver = self.create_webdriver_instance()
+        with self.condition:
+            self.pages[driver] = 0
+            self.stats_counters['created'] += 1
+        return driver
 
-        for _ in range(size):
-            driver = self.create_webdriver_instance()
-            self.available_drivers.put(driver)
+    def get_driver(self, timeout=None):
+        """
+        Checks out a healthy driver, creating one if the pool is below its size.
 
-    def get_driver(self):
-        driver = self.available_drivers.get(block=True)
+        Args:
+            timeout (float, optional): Seconds to wait for a free driver. Defaults to the pool's checkout_timeout.
+
+        Raises:
+            TimeoutError: If no driver became free in time.
+            RuntimeError: If the pool was closed.
+        """
+        timeout = self.checkout_timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+
+        with self.condition:
+            while True:
+                if self.closed:
+                    raise RuntimeError("The driver pool is closed")
+                if self.idle:
+                    driver = self.idle.pop()
+                    break
+                if self.total < self.size:
+                    self.total += 1
+                    driver = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.stats_counters['timeouts'] += 1
+                    raise TimeoutError(f"No driver became free within {timeout}s ({self.size} in use)")
+                self.condition.wait(remaining)
+
+        if driver is None:
+            driver = self.create_in_slot()
+        elif not self.is_healthy(driver):
+            print("Replacing a driver that stopped responding")
+            self.discard(driver)
+            driver = self.create_in_slot()
+            with self.condition:
+                self.stats_counters['restarts'] += 1
+
+        waited = time.monotonic() - started
+        with self.condition:
+            self.pages[driver] = self.pages.get(driver, 0) + 1
+            self.checked_out_at[driver] = time.monotonic()
+            self.stats_counters['checkouts'] += 1
+            self.stats_counters['wait_time'] += waited
+            self.stats_counters['max_wait'] = max(self.stats_counters['max_wait'], waited)
         return driver
 
+    def create_in_slot(self):
+        """
+        Creates a driver for a slot the caller already counted in total, giving the slot back on failure.
+        """
+        try:
+            return self.create()
+        except Exception:
+            with self.condition:
+                self.total -= 1
+                self.condition.notify()
+            raise
+
     def release_driver(self, driver):
-        self.available_drivers.put(driver)
+        """
+        Returns a driver to the pool, or replaces it if it is worn out (see max_pages and max_rss_mb).
+        """
+        if driver is None:
+            return
+        with self.condition:
+            checked_out_at = self.checked_out_at.pop(driver, None)
+            if checked_out_at is not None:
+                self.stats_counters['busy_time'] += time.monotonic() - checked_out_at
+            pages = self.pages.get(driver, 0)
+
+        rss_mb = get_rss_mb(driver)
+        if self.closed or pages >= self.max_pages or (rss_mb is not None and rss_mb > self.max_rss_mb):
+            if not self.closed:
+                print(f"Recycling a driver after {pages} pages ({rss_mb:.0f} MB)" if rss_mb is not None else f"Recycling a driver after {pages} pages")
+            self.discard(driver)
+            with self.condition:
+                self.total -= 1
+                if not self.closed:
+                    self.stats_counters['recycled'] += 1
+                self.condition.notify()
+            return
+
+        with self.condition:
+            self.idle.append(driver)
+            self.condition.notify()
+
+    def discard(self, driver):
+        with self.condition:
+            self.pages.pop(driver, None)
+            self.checked_out_at.pop(driver, None)
+            debugger_address = self.debugger_addresses.pop(driver, None)
+        try:
+            driver.quit()
+        except Exception as e:
+            print(f"Error closing driver: {str(e)}")
+        if debugger_address:
+            release_debugger_address(debugger_address)
+
+    @staticmethod
+    def is_healthy(driver):
+        """
+        Returns True if the driver's chromedriver is still running and its browser answers a trivial command.
+        """
+        try:
+            process = getattr(getattr(driver, 'service', None), 'process', None)
+            if process is not None and process.poll() is not None:
+                return False
+            driver.execute_script('return 1')
+            return True
+        except Exception:
+            return False
+
+    def stats(self):
+        """
+        Returns the pool's counters: checkouts, average and maximum checkout wait (seconds), utilization
+        (share of the pool's driver-time spent checked out), drivers created, restarts (crashed drivers
+        replaced), recycled (worn-out drivers replaced) and checkout timeouts.
+        """
+        with self.condition:
+            counters = dict(self.stats_counters)
+            in_use = len(self.checked_out_at)
+            idle = len(self.idle)
+        elapsed = time.monotonic() - self.started_at
+        counters['avg_wait'] = counters['wait_time'] / counters['checkouts'] if counters['checkouts'] else 0.0
+        counters['utilization'] = counters['busy_time'] / (self.size * elapsed) if elapsed > 0 else 0.0
+        counters['in_use'] = in_use
+        counters['idle'] = idle
+        return counters
 
     def create_webdriver_instance(self):
         options = Options()
-        options.add_argument("--headless=new")
-        options.add_argument('--no-sandbox')
-        options.add_argument('--disable-dev-shm-usage')
-        options.add_argument('--disable-gpu')
-        options.add_argument('--window-size=1920,1080')
-        
+        for argument in CHROME_ARGUMENTS:
+            options.add_argument(argument)
+        if self.block_resources:
+            for argument in LIGHTWEIGHT_CHROME_ARGUMENTS:
+                options.add_argument(argument)
+            options.add_experimental_option('prefs', BLOCKED_CONTENT_PREFS)
+            # driver.get returns at DOMContentLoaded instead of waiting for every subresource; the scrapers wait for their elements anyway
+            options.page_load_strategy = 'eager'
+        else:
+            options.add_argument('--window-size=1920,1080')
+
+        service_url = get_browser_service_url()
+        if service_url:
+            # Attach to the shared browser service: no chromedriver to resolve or spawn here
+            if self.block_resources:
+                driver = self.attach_to_running_browser(service_url)
+                if driver is not None:
+                    return self.prepare(driver)
+            executor = ChromiumRemoteConnection(service_url, vendor_prefix='goog', browser_name='chrome')
+            return self.prepare(webdriver.Remote(command_executor=executor, options=options))
+
         try:
-            # Using the latest ChromeDriver without specifying version
-            driver = webdriver.Chrome(
-                service=Service(ChromeDriverManager().install()),
-                options=options
-            )
-            return driver
+            driver = webdriver.Chrome(service=Service(resolve_chromedriver()), options=options)
+        except SessionNotCreatedException as e:
+            # The cached chromedriver no longer matches Chrome (e.g. Chrome was upgraded): resolve it again
+            print(f"Error creating WebDriver, resolving ChromeDriver again: {str(e)}")
+            driver = webdriver.Chrome(service=Service(resolve_chromedriver(refresh=True)), options=options)
+        return self.prepare(driver)
+
+    def attach_to_running_browser(self, service_url):
+        """
+        Starts a session on one of the browsers the browser service started ahead of time (they run the
+        lightweight profile), so no Chrome is launched for it.
+
+        Returns:
+            The driver, or None if no such browser is free or it could not be attached to.
+        """
+        debugger_address = claim_debugger_address()
+        if debugger_address is None:
+            return None
+
+        options = Options()
+        options.debugger_address = debugger_address
+        options.page_load_strategy = 'eager'
+        try:
+            executor = ChromiumRemoteConnection(service_url, vendor_prefix='goog', browser_name='chrome')
+            driver = webdriver.Remote(command_executor=executor, options=options)
         except Exception as e:
-            print(f"Error creating WebDriver: {str(e)}")
+            print(f"Error attaching to the browser at {debugger_address}, launching a new one: {str(e)}")
+            release_debugger_address(debugger_address)
+            return None
+
+        with self.condition:
+            self.debugger_addresses[driver] = debugger_address
+        return driver
+
+    def prepare(self, driver):
+        """
+        Blocks the unneeded requests (BLOCKED_URL_PATTERNS) at the network level through the DevTools protocol.
+        """
+        if self.block_resources:
             try:
-                # Fallback for ARM Macs
-                driver = webdriver.Chrome(
-                    service=Service(
-                        ChromeDriverManager(chrome_type=ChromeType.CHROMIUM).install()
-                    ),
-                    options=options
-                )
-                return driver
+                execute_cdp(driver, 'Network.enable', {})
+                execute_cdp(driver, 'Network.setBlockedURLs', {'urls': BLOCKED_URL_PATTERNS})
             except Exception as e:
-                print(f"Fallback also failed: {str(e)}")
-                raise
+                print(f"Warning: Could not block requests: {str(e)}")
+        return driver
 
     def close_all_drivers(self):
-        while not self.available_drivers.empty():
-            driver = self.available_drivers.get()
-            try:
-                driver.quit()
-            except Exception as e:
-                print(f"Error closing driver: {str(e)}")
\ No newline at end of file
+        with self.condition:
+            if self.closed:
+                return
+            self.closed = True
+            drivers, self.idle = self.idle, []
+            self.total -= len(drivers)
+            # Threads waiting in get_driver raise instead of waiting out their timeout
+            self.condition.notify_all()
+        for driver in drivers:
+            self.discard(driver)
+
+        stats = self.stats()
+        print(
+            f"DriverPool: {stats['checkouts']} checkouts, waited {stats['avg_wait']:.2f}s on average (max {stats['max_wait']:.1f}s), "
+            f"{stats['utilization']:.0%} utilization, {stats['created']} drivers created, {stats['restarts']} restarts, "
+            f"{stats['recycled']} recycled, {stats['timeouts']} checkout timeouts"
+        )
@@ -0,0 +1,64 @@
+import logging
+import threading
+from django.db import connection, transaction
+
+logger = logging.getLogger(__name__)
+
+class GenreResolver:
+    """
+    Maps genre names to their ids in the genre table, shared by every scraper thread of the process.
+
+    There are only a few hundred genres, but every book used to look its genres up one query at a time.
+    The resolver loads the whole table on first use and from then on only goes to the database for
+    names it has never seen, inserting all of them with a single statement.
+    """
+
+    def __init__(self):
+        self.ids = None
+        self.lock = threading.Lock()
+
+    def load(self, cursor):
+        cursor.execute("SELECT name, id FROM genre")
+        self.ids = dict(cursor.fetchall())
+        logger.info(f"Loaded {len(self.ids)} genres")
+
+    def resolve(self, names):
+        """
+        Returns the ids of the given genres, creating the ones that do not exist yet.
+
+        Must not be called inside another transaction: new genres are committed right away, so an id is
+        never cached for a row that a rolled-back transaction took with it.
+
+        Args:
+            names (iterable): Normalized (stripped, lower-case) genre names.
+
+        Returns:
+            dict: Genre name to genre id, for every given name.
+        """
+        names = set(names)
+        with self.lock:
+            if self.ids is not None and names.issubset(self.ids):
+                return {name: self.ids[name] for name in names}
+
+            with transaction.atomic(), connection.cursor() as cursor:
+                if self.ids is None:
+                    self.load(cursor)
+                missing = sorted(names - self.ids.keys())
+                if missing:
+                    cursor.execute("""
+                        INSERT INTO genre (name)
+                        SELECT UNNEST(%s::varchar[])
+                        ON CONFLICT (name) DO NOTHING
+                        RETURNING name, id
+                    """, [missing])
+                    self.ids.update(cursor.fetchall())
+
+                    # Genres another process inserted in the meantime are not returned by DO NOTHING
+                    still_missing = [name for name in missing if name not in self.ids]
+                    if still_missing:
+                        cursor.execute("SELECT name, id FROM genre WHERE name = ANY(%s)", [still_missing])
+                        self.ids.update(cursor.fetchall())
+
+            return {name: self.ids[name] for name in names}
+
+genre_resolver = GenreResolver()
@@ -0,0 +1,74 @@
+from bs4 import BeautifulSoup, SoupStrainer
+from centralized_API_backend.management.commands.utils import http_client, http_cache
+
+try:
+    import lxml  # noqa: F401
+    # lxml's C parser builds the tree several times faster than the pure-Python html.parser
+    PARSER = 'lxml'
+except ImportError:
+    PARSER = 'html.parser'
+
+# The parts of a page the scrapers actually read, for make_soup(parse_only=...). Everything else is
+# skipped while parsing, so it is never turned into Tag objects.
+SERIES_LINKS = SoupStrainer('a', class_='series')
+SERIES_CARDS = SoupStrainer('div', class_='bsx')
+LATEST_UPDATES = SoupStrainer('div', class_='page-item-detail')
+
+def make_soup(markup, parse_only=None, encoding=None):
+    """
+    Parses an HTML document into a BeautifulSoup tree.
+
+    Args:
+        markup (bytes or str): The HTML to parse. Prefer the raw bytes of the response: they are decoded by the parser
+            itself, instead of requests guessing the charset first.
+        parse_only (SoupStrainer, optional): Only build the tree for the matching elements (see SERIES_LINKS...).
+        encoding (str, optional): The charset declared by the server, if markup is bytes. Without it the page's
+            <meta charset> is used.
+
+    Returns:
+        BeautifulSoup: The parsed document.
+    """
+    if isinstance(markup, bytes) and encoding:
+        return BeautifulSoup(markup, PARSER, parse_only=parse_only, from_encoding=encoding)
+    return BeautifulSoup(markup, PARSER, parse_only=parse_only)
+
+def declared_encoding(response):
+    """
+    Returns the charset of a requests response's Content-Type header, or None if it has none.
+
+    requests falls back to ISO-8859-1 for any text/* response without a charset, which would garble
+    UTF-8 pages, so its response.encoding is only trusted when the header really names one.
+    """
+    return response.encoding if 'charset' in response.headers.get('Content-Type', '').lower() else None
+
+def parse_response(response, parse_only=None):
+    """
+    Parses the body of a requests response, without going through response.text.
+    """
+    return make_soup(response.content, parse_only=parse_only, encoding=declared_encoding(response))
+
+def fetch_soup(url, conditional=False, parse_only=None):
+    """
+    Downloads a page through the shared HTTP client and parses it.
+
+    Scrapers fetch each book page once with this and hand the same tree to both
+    scrape_newest_chapter (the skip check) and scrape_book_details, instead of each
+    method downloading and parsing the page on its own.
+
+    Args:
+        url (str): The URL of the page.
+        conditional (bool): Send the page's stored ETag / Last-Modified validators (see http_cache).
+            The caller must commit the URL with http_cache.validator_cache once the page was processed.
+        parse_only (SoupStrainer, optional): Only parse the matching elements.
+
+    Returns:
+        BeautifulSoup: The parsed page, or None if conditional and the page has not changed.
+
+    Raises:
+        requests.exceptions.RequestException: If the page could not be downloaded.
+    """
+    response = http_cache.get(url) if conditional else http_client.get(url)
+    response.raise_for_status()
+    if response.status_code == 304:
+        return None
+    return parse_response(response, parse_only=parse_only)
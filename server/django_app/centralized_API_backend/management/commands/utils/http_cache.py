@@ -0,0 +1,127 @@
+import os
+import logging
+import threading
+from centralized_API_backend.management.commands.utils import http_client
+from centralized_API_backend.management.commands.utils.state_store import StateStore
+
+logger = logging.getLogger(__name__)
+
+# Set SCRAPER_HTTP_CACHE=0 to ignore the stored validators and download every page in full (e.g. after a database restore)
+HTTP_CACHE_ENV = "SCRAPER_HTTP_CACHE"
+
+HTTP_CACHE_NAMESPACE = "http_validators"
+
+class ValidatorCache:
+    """
+    Remembers the ETag / Last-Modified validators of the pages a scraper has processed, so the next
+    run can ask the site for the page only if it changed (If-None-Match / If-Modified-Since).
+    A 304 Not Modified answer has no body, so there is nothing to download or parse.
+
+    Validators of a fresh response are only kept in memory until the scraper calls commit() for the URL,
+    which it does once the page was stored successfully. A page that failed to process is therefore never
+    answered with a 304 on the next run.
+    """
+
+    def __init__(self, store=None):
+        self.store = store
+        self.saved = {}
+        self.pending = {}
+        self.lock = threading.Lock()
+
+    def get_store(self):
+        if self.store is None:
+            self.store = StateStore(HTTP_CACHE_NAMESPACE)
+        return self.store
+
+    @staticmethod
+    def enabled():
+        return os.environ.get(HTTP_CACHE_ENV, '1') != '0'
+
+    def preload(self, urls):
+        """
+        Loads the saved validators of many URLs with a single query, instead of one query per page.
+        """
+        if not self.enabled():
+            return
+        urls = list(urls)
+        try:
+            saved = self.get_store().get_many(urls)
+        except Exception as e:
+            logger.warning(f"Could not load the saved HTTP validators: {e}")
+            return
+        with self.lock:
+            self.saved.update(saved)
+            self.saved.update((url, None) for url in urls if url not in saved)
+
+    def conditional_headers(self, url):
+        """
+        Returns the If-None-Match / If-Modified-Since headers for a URL (empty if it was never processed).
+        """
+        if not self.enabled():
+            return {}
+        with self.lock:
+            known = url in self.saved
+            validators = self.saved.get(url)
+        if not known:
+            try:
+                validators = self.get_store().get(url)
+            except Exception as e:
+                logger.warning(f"Could not load the saved HTTP validators of {url}: {e}")
+                validators = None
+
+        headers = {}
+        if validators and validators.get('etag'):
+            headers['If-None-Match'] = validators['etag']
+        if validators and validators.get('last_modified'):
+            headers['If-Modified-Since'] = validators['last_modified']
+        return headers
+
+    def remember(self, url, headers):
+        """
+        Keeps the validators of a fresh (200) response until the page is committed.
+
+        Args:
+            url (str): The requested URL.
+            headers (Mapping): The response headers (requests or aiohttp, both are case-insensitive).
+        """
+        validators = {'etag': headers.get('ETag'), 'last_modified': headers.get('Last-Modified')}
+        if validators['etag'] or validators['last_modified']:
+            with self.lock:
+                self.pending[url] = validators
+
+    def commit(self, urls):
+        """
+        Saves the validators of pages that were processed successfully.
+        """
+        with self.lock:
+            values = {url: self.pending.pop(url) for url in urls if url in self.pending}
+            self.saved.update(values)
+        if not values:
+            return
+        try:
+            self.get_store().set_many(values)
+        except Exception as e:
+            logger.warning(f"Could not save the HTTP validators: {e}")
+
+validator_cache = ValidatorCache()
+
+def get(url, **kwargs):
+    """
+    Sends a conditional GET through the shared HTTP client.
+
+    If the page has not changed since it was last committed, the server answers 304 Not Modified
+    and the returned response has no body; callers should treat that as "unchanged" and skip the page.
+
+    Args:
+        url (str): The URL to fetch.
+        **kwargs: Any keyword arguments accepted by http_client.get.
+
+    Returns:
+        requests.Response: The response (status 304 if the page has not changed).
+    """
+    headers = dict(kwargs.pop('headers', None) or {})
+    headers.update(validator_cache.conditional_headers(url))
+    response = http_client.get(url, headers=headers, **kwargs)
+    if response.status_code == 200:
+        validator_cache.remember(url, response.headers)
+    return response
@@ -0,0 +1,103 @@
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib3.util.request import ACCEPT_ENCODING
+from centralized_API_backend.management.commands.utils.concurrency import OVERLOAD_STATUSES, KIND_AJAX, concurrency_controller
+
+# (connect, read) timeouts in seconds. Without a timeout, a single hung server blocks a worker forever.
+DEFAULT_TIMEOUT = (10, 30)
+
+# Number of hosts to keep connection pools for, and number of keep-alive connections kept per host
+POOL_CONNECTIONS = 64
+POOL_MAXSIZE = 32
+
+# One retry policy for every scraper: retry connection errors and transient server errors with
+# exponential backoff (1s, 2s, 4s), honouring Retry-After when a site rate limits us.
+RETRY_POLICY = Retry(
+    total=3,
+    backoff_factor=1,
+    status_forcelist=(429, 500, 502, 503, 504),
+    allowed_methods=frozenset(['GET', 'HEAD']),
+    respect_retry_after_header=True,
+    raise_on_status=False,
+)
+
+_session = None
+_session_lock = threading.Lock()
+
+def build_session():
+    """
+    Builds a requests Session with keep-alive connection pooling, compression and retries.
+
+    Returns:
+        requests.Session: The configured session.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, max_retries=RETRY_POLICY)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+
+    # ACCEPT_ENCODING is 'gzip,deflate' plus ',br' when the brotli package is installed
+    session.headers['Accept-Encoding'] = ACCEPT_ENCODING
+    return session
+
+def get_session():
+    """
+    Returns the process-wide session shared by every scraper.
+
+    Sharing one session means every request to the same host reuses an already open TCP+TLS
+    connection instead of paying a new handshake per page. When scrapers run in-process
+    (master_scraper --in-process), all sources share the same pools.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = build_session()
+    return _session
+
+def get(url, **kwargs):
+    """
+    Sends a GET request through the shared session. Drop-in replacement for requests.get.
+
+    Requests go through the host's adaptive concurrency limit: the call waits while the host
+    already has as many requests in flight as it can take, and the outcome (latency, 403/429/503,
+    timeouts) adjusts that limit.
+
+    Args:
+        url (str): The URL to fetch.
+        **kwargs: Any keyword arguments accepted by requests.Session.get. A default timeout is applied.
+
+    Returns:
+        requests.Response: The response. Callers are still responsible for calling raise_for_status().
+    """
+    kwargs.setdefault('timeout', DEFAULT_TIMEOUT)
+    with concurrency_controller.slot(url) as request:
+        response = get_session().get(url, **kwargs)
+        request.status = get_overload_status(response) or response.status_code
+    return response
+
+def post(url, **kwargs):
+    """
+    Sends a POST request through the shared session, under the same adaptive concurrency limit as get().
+    POST requests are not retried: they may not be idempotent.
+    """
+    kwargs.setdefault('timeout', DEFAULT_TIMEOUT)
+    with concurrency_controller.slot(url, kind=KIND_AJAX) as request:
+        response = get_session().post(url, **kwargs)
+        request.status = get_overload_status(response) or response.status_code
+    return response
+
+def get_overload_status(response):
+    """
+    Returns 403/429/503 if the server answered with one of them at any point, including responses
+    that urllib3 already retried internally, otherwise None.
+    """
+    if response.status_code in OVERLOAD_STATUSES:
+        return response.status_code
+    retries = getattr(response.raw, 'retries', None)
+    for attempt in getattr(retries, 'history', ()):
+        if attempt.status in OVERLOAD_STATUSES:
+            return attempt.status
+    return None
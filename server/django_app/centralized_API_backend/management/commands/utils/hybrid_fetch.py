@@ -0,0 +1,213 @@
+import time
+import logging
+import threading
+from queue import Queue
+from concurrent.futures import ThreadPoolExecutor
+from requests.exceptions import RequestException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
+from centralized_API_backend.management.commands.utils import http_client
+from centralized_API_backend.management.commands.utils.html_parsing import make_soup, parse_response
+from centralized_API_backend.management.commands.utils.concurrency import concurrency_controller, KIND_BROWSER
+from centralized_API_backend.management.commands.utils.state_store import StateStore
+
+FETCH_MODE_NAMESPACE = "fetch_modes"
+
+HTTP_MODE = 'http'
+BROWSER_MODE = 'browser'
+
+# Pages in a row that must come back incomplete over HTTP before a source is switched to the browser
+FAILURES_TO_ESCALATE = 3
+
+# How long a source stays on the browser before plain HTTP is tried again, in seconds
+REPROBE_INTERVAL = 6 * 60 * 60
+
+# How long the browser waits for the expected elements, in seconds
+BROWSER_WAIT = 10
+
+# Pages fetch_all requests at the same time
+FETCH_ALL_WORKERS = 4
+
+class HybridFetcher:
+    """
+    Fetches pages of a Selenium source with plain HTTP when the site renders them server-side,
+    and with the browser when it does not.
+
+    A page fetched over HTTP is only used if every expected selector is found in it. Otherwise (blocked,
+    rendered by JavaScript, error page) that page is loaded in the browser instead. After
+    FAILURES_TO_ESCALATE incomplete pages in a row, the whole source switches to the browser. The
+    decision is saved per source, so the next runs start in the right mode, and a source on the browser
+    is probed over HTTP again every REPROBE_INTERVAL in case the site changed back.
+
+    Usage:
+        fetcher = HybridFetcher('Kalango', ['.listing-chapters_wrap .wp-manga-chapter a'], logger=logger)
+        soup = fetcher.fetch(url, driver)
+    """
+
+    def __init__(self, source, expected_selectors, logger=None, store=None):
+        """
+        Args:
+            source (str): The source's name, the key of the saved decision.
+            expected_selectors (list): CSS selectors a complete page always contains.
+            logger (logging.Logger, optional): The scraper's logger.
+            store (StateStore, optional): Where the decisions are persisted.
+        """
+        self.source = source
+        self.expected_selectors = expected_selectors
+        self.logger = logger or logging.getLogger(__name__)
+        self.store = store or StateStore(FETCH_MODE_NAMESPACE)
+        saved = self.store.get(source) or {}
+        self.mode = saved.get('mode', HTTP_MODE)
+        self.since = saved.get('since', 0.0)
+        self.failures = 0
+        self.probing = False
+        self.lock = threading.Lock()
+
+    def fetch(self, url, driver):
+        """
+        Returns the parsed page, fetched over HTTP if possible and with the given browser otherwise.
+        When the browser was used, the driver is left on the page.
+
+        Args:
+            url (str): The URL of the page.
+            driver (webdriver): The calling thread's browser, from its DriverPool.
+
+        Returns:
+            BeautifulSoup: The parsed page.
+        """
+        if self.use_http():
+            soup = self.fetch_http(url)
+            if self.record(soup is not None):
+                return soup
+        return self.fetch_browser(url, driver)
+
+    def fetch_all(self, urls, driver, driver_pool=None, max_workers=FETCH_ALL_WORKERS):
+        """
+        Fetches several pages at the same time and returns them in the order of urls.
+
+        Pages are requested concurrently over HTTP. The ones that need the browser are then loaded on the
+        given driver, plus any driver driver_pool can hand out without waiting (borrowed for the call), so
+        they are loaded in parallel too when the pool has spare browsers.
+
+        Args:
+            urls (list): The URLs of the pages.
+            driver (webdriver): The calling thread's browser, from its DriverPool.
+            driver_pool (DriverPool, optional): Where to borrow extra browsers from.
+            max_workers (int): Maximum number of pages fetched at the same time.
+
+        Returns:
+            list: The parsed pages (BeautifulSoup).
+        """
+        if not urls:
+            return []
+        workers = min(max_workers, len(urls))
+
+        def fetch_http(url):
+            if not self.use_http():
+                return None
+            soup = self.fetch_http(url)
+            return soup if self.record(soup is not None) else None
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pages = list(executor.map(fetch_http, urls))
+
+        missing = [index for index, page in enumerate(pages) if page is None]
+        if not missing:
+            return pages
+
+        borrowed = []
+        if driver_pool is not None:
+            for _ in range(min(workers, len(missing)) - 1):
+                try:
+                    borrowed.append(driver_pool.get_driver(timeout=0))
+                except TimeoutError:
+                    break
+        drivers = Queue()
+        for browser in [driver, *borrowed]:
+            drivers.put(browser)
+
+        def fetch_browser(index):
+            browser = drivers.get()
+            try:
+                pages[index] = self.fetch_browser(urls[index], browser)
+            finally:
+                drivers.put(browser)
+
+        try:
+            with ThreadPoolExecutor(max_workers=len(borrowed) + 1) as executor:
+                # list() re-raises the first error, like a sequential loop would
+                list(executor.map(fetch_browser, missing))
+        finally:
+            for browser in borrowed:
+                driver_pool.release_driver(browser)
+        return pages
+
+    def use_http(self):
+        with self.lock:
+            if self.mode == HTTP_MODE:
+                return True
+            # On the browser: one thread at a time checks whether HTTP works again
+            if not self.probing and time.time() - self.since >= REPROBE_INTERVAL:
+                self.probing = True
+                return True
+            return False
+
+    def record(self, complete):
+        """
+        Updates the decision with the outcome of an HTTP fetch. Returns complete.
+        """
+        with self.lock:
+            if self.mode == BROWSER_MODE:
+                self.probing = False
+                if complete:
+                    self.switch(HTTP_MODE, "the pages are complete over HTTP again")
+                else:
+                    # Still incomplete: wait another REPROBE_INTERVAL
+                    self.since = time.time()
+                    self.save()
+            elif complete:
+                self.failures = 0
+            else:
+                self.failures += 1
+                if self.failures >= FAILURES_TO_ESCALATE:
+                    self.switch(BROWSER_MODE, f"{self.failures} pages in a row were incomplete over HTTP")
+        return complete
+
+    def switch(self, mode, reason):
+        self.logger.info(f"{self.source}: switching to {mode} fetching ({reason})")
+        self.mode = mode
+        self.since = time.time()
+        self.failures = 0
+        self.save()
+
+    def save(self):
+        self.store.set(self.source, {'mode': self.mode, 'since': self.since})
+
+    def fetch_http(self, url):
+        """
+        Returns the page fetched over HTTP, or None if it could not be fetched or lacks an expected element.
+        """
+        try:
+            response = http_client.get(url)
+        except RequestException as e:
+            self.logger.warning(f"Error fetching {url} over HTTP: {e}")
+            return None
+        if response.status_code != 200:
+            return None
+        soup = parse_response(response)
+        if all(soup.select_one(selector) for selector in self.expected_selectors):
+            return soup
+        return None
+
+    def fetch_browser(self, url, driver):
+        with concurrency_controller.slot(url, kind=KIND_BROWSER):
+            driver.get(url)
+        try:
+            WebDriverWait(driver, BROWSER_WAIT).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, self.expected_selectors[0]))
+            )
+        except TimeoutException:
+            self.logger.warning(f"{self.expected_selectors[0]} not found on {url}")
+        return make_soup(driver.page_source)
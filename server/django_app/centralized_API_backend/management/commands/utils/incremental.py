@@ -0,0 +1,131 @@
+import os
+import logging
+import urllib.parse
+from centralized_API_backend.management.commands.utils.html_parsing import fetch_soup, LATEST_UPDATES
+from centralized_API_backend.management.commands.utils.state_store import StateStore
+
+# Set SCRAPER_FULL_CRAWL=1 to ignore the watermarks and walk every book of every source
+FULL_CRAWL_ENV = "SCRAPER_FULL_CRAWL"
+
+WATERMARK_NAMESPACE = "watermarks"
+
+# How many pages of the "latest updates" listing to read before giving up on finding the watermark
+MAX_FEED_PAGES = 10
+
+# Number of entries from the top of the listing kept as the watermark. Keeping several (instead of only the
+# newest) means the watermark is still found when the newest book got another chapter since the last run.
+WATERMARK_SIZE = 10
+
+class LatestUpdatesFeed:
+    """
+    Incremental crawl for Madara (WordPress theme) sources.
+
+    Madara lists every series ordered by its latest chapter under `<listing>?m_orderby=latest`, over plain
+    HTTP. The feed reads that listing from the top and stops at the high-water mark saved by the last
+    complete run: the (book URL, newest chapter) pairs that were at the top of the listing back then.
+    Every book above the mark got a new chapter since, everything below it did not, so only the books
+    above the mark need to be scraped.
+
+    When there is no watermark yet, or it cannot be found within MAX_FEED_PAGES pages, updated_books()
+    returns None and the scraper falls back to its full crawl.
+
+    Usage:
+        feed = LatestUpdatesFeed('https://kalango.org/manga/', logger=logger)
+        books = feed.updated_books()
+        if books is None:
+            books = <full crawl>
+        ...
+        if no errors:
+            feed.commit()
+    """
+
+    def __init__(self, listing_url, logger=None, store=None):
+        """
+        Args:
+            listing_url (str): The source's Madara listing (e.g. 'https://kalango.org/manga/' or the home page).
+            logger (logging.Logger, optional): The scraper's logger.
+            store (StateStore, optional): Where the watermarks are persisted.
+        """
+        self.listing_url = listing_url
+        self.logger = logger or logging.getLogger(__name__)
+        self.store = store or StateStore(WATERMARK_NAMESPACE)
+        self.head = None
+        self.incremental = False
+
+    def page_url(self, page):
+        parts = urllib.parse.urlsplit(self.listing_url)
+        path = parts.path if parts.path.endswith('/') else parts.path + '/'
+        if page > 1:
+            path += f'page/{page}/'
+        return urllib.parse.urlunsplit((parts.scheme, parts.netloc, path, 'm_orderby=latest', ''))
+
+    def read_page(self, page):
+        """
+        Returns the (title, url, newest chapter) entries of one listing page, in listing order.
+        """
+        soup = fetch_soup(self.page_url(page), parse_only=LATEST_UPDATES)
+        entries = []
+        for item in soup.select('.page-item-detail'):
+            link = item.select_one('.post-title a')
+            if not link or not link.get('href'):
+                continue
+            chapter = item.select_one('.chapter-item .chapter a') or item.select_one('.chapter a')
+            entries.append((link.get_text().strip(), link['href'], chapter.get_text().strip() if chapter else None))
+        return entries
+
+    def updated_books(self):
+        """
+        Reads the latest updates down to the watermark.
+
+        Returns:
+            list: (title, url) tuples of the books updated since the last complete run, newest first,
+                  or None if a full crawl is needed.
+        """
+        if os.environ.get(FULL_CRAWL_ENV) == '1':
+            self.logger.info("Full crawl requested. Ignoring the watermark.")
+            self.read_head()
+            return None
+
+        watermark = self.store.get(self.listing_url)
+        marks = {tuple(mark) for mark in watermark} if watermark else set()
+        books = []
+        seen_urls = set()
+        try:
+            for page in range(1, MAX_FEED_PAGES + 1):
+                entries = self.read_page(page)
+                if page == 1:
+                    self.head = entries[:WATERMARK_SIZE]
+                if not entries:
+                    break
+                for title, url, chapter in entries:
+                    if chapter is not None and (url, chapter) in marks:
+                        self.incremental = True
+                        self.logger.info(f"Incremental crawl: {len(books)} books updated since the last run.")
+                        return books
+                    if url not in seen_urls:
+                        seen_urls.add(url)
+                        books.append((title, url))
+        except Exception as e:
+            self.logger.warning(f"Could not read the latest updates of {self.listing_url}: {e}")
+            return None
+
+        if watermark:
+            self.logger.info(f"Watermark not found in the first {MAX_FEED_PAGES} pages of latest updates. Falling back to a full crawl.")
+        else:
+            self.logger.info("No watermark saved yet. Running a full crawl.")
+        return None
+
+    def read_head(self):
+        try:
+            self.head = self.read_page(1)[:WATERMARK_SIZE]
+        except Exception as e:
+            self.logger.warning(f"Could not read the latest updates of {self.listing_url}: {e}")
+
+    def commit(self):
+        """
+        Saves the top of the listing, as read at the start of this run, as the new watermark.
+        Only call this once every book of the run was stored; books that failed are then picked up again next time.
+        """
+        head = [[url, chapter] for _, url, chapter in (self.head or []) if chapter is not None]
+        if head:
+            self.store.set(self.listing_url, head)
@@ -0,0 +1,359 @@
+import os
+import asyncio
+import multiprocessing
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from urllib3.util.request import ACCEPT_ENCODING
+from centralized_API_backend.management.commands.utils.html_parsing import make_soup, fetch_soup
+from centralized_API_backend.management.commands.utils.http_cache import validator_cache
+from centralized_API_backend.management.commands.utils.book_writer import book_writer
+from centralized_API_backend.management.commands.utils.concurrency import concurrency_controller, get_host
+from centralized_API_backend.management.commands.utils.scraper_registry import scraper_reference, resolve_scraper_reference
+
+try:
+    import aiohttp
+except ImportError:
+    # Without aiohttp, ListModeEngine falls back to a thread pool of blocking requests
+    aiohttp = None
+
+# Mirrors http_client.RETRY_POLICY so both engines back off the same way
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAX_RETRIES = 3
+BACKOFF_FACTOR = 1
+
+# (connect, total) timeouts in seconds for a single book page
+CONNECT_TIMEOUT = 10
+TOTAL_TIMEOUT = 60
+
+# Number of processes parsing book pages in pipeline mode (unset or 0: parse in the worker threads)
+PARSE_PROCESSES_ENV = "SCRAPER_PARSE_PROCESSES"
+
+# Pages (or parsed books) each pipeline queue holds per parse process before the stage feeding it waits
+QUEUE_SIZE_PER_PROCESS = 4
+
+def get_parse_processes():
+    value = os.environ.get(PARSE_PROCESSES_ENV)
+    try:
+        return max(0, int(value)) if value else 0
+    except ValueError:
+        return 0
+
+def parse_book_page(scraper_ref, url, body, encoding):
+    """
+    Runs in the parse processes: turns a downloaded book page into the scraper's (newest chapter, details).
+
+    The scraper class is passed as a scraper_registry.scraper_reference: scripts loaded from a file path
+    cannot always be pickled by reference, and a spawned process has to import the script itself.
+    """
+    scraper = resolve_scraper_reference(scraper_ref)()
+    soup = make_soup(body, encoding=encoding)
+    return scraper.scrape_newest_chapter(url, soup=soup), scraper.scrape_book_details(url, soup=soup)
+
+class ListModeEngine:
+    """
+    Scrapes every book of a list-mode (MangaStream theme) source on an asyncio event loop.
+
+    Every book gets its own task, so the network wait of a few hundred book pages overlaps,
+    bounded only by the host's adaptive concurrency limit (see concurrency.AdaptiveConcurrencyController). Parsing the page and writing to the database are
+    blocking, so they run in a small thread pool off the event loop through the scraper's own
+    scrape_book_and_update_db(title_url_tuple, book_number, total_books, soup=...).
+
+    Book pages are requested conditionally (see http_cache): a page that answers 304 Not Modified
+    is counted as skipped without being parsed or touching the database.
+
+    Parsing holds the GIL, so past a few dozen pages in flight the worker threads become the bottleneck.
+    In pipeline mode (SCRAPER_PARSE_PROCESSES=N) the work is split into stages joined by bounded queues:
+    the event loop only downloads bytes, N processes parse them into the scraper's details, and a single
+    thread writes the results. A full queue holds back the stage feeding it, so a slow stage never piles
+    up pages in memory.
+    """
+
+    def __init__(self, scraper, novel_source, initial_limit, max_limit=None, worker_threads=8, logger=None, parse_processes=None):
+        """
+        Args:
+            scraper: The list-mode scraper (e.g. FlameComicsScraper).
+            novel_source (str): The source's novel_source in all_books, whose books are flushed at the end of run().
+            initial_limit (int): In-flight requests per host to start with when the host's limit has not been learned yet.
+            max_limit (int, optional): Hard cap on the host's learned limit, e.g. 1 for sources that ban faster scraping.
+            worker_threads (int): Number of threads used to parse pages and write to the database.
+            logger (logging.Logger, optional): The scraper's logger.
+            parse_processes (int, optional): Number of parse processes for pipeline mode, 0 to disable it.
+                Defaults to SCRAPER_PARSE_PROCESSES.
+        """
+        self.scraper = scraper
+        self.novel_source = novel_source
+        self.initial_limit = max(1, initial_limit)
+        self.max_limit = max_limit
+        self.worker_threads = worker_threads
+        self.parse_processes = get_parse_processes() if parse_processes is None else parse_processes
+        self.logger = logger or logging.getLogger(__name__)
+        self.host_gates = {}
+        self.in_flight = {}
+
+    def run(self, books):
+        """
+        Scrapes and stores every book.
+
+        Args:
+            books (iterable): (title, url) tuples, e.g. the items of scrape_book_titles().
+
+        Returns:
+            dict: The number of books that were 'processed', 'skipped' and that hit an 'error'.
+        """
+        books = list(books)
+        self.completed_urls = []
+        validator_cache.preload(url for _, url in books)
+        if aiohttp is None:
+            self.logger.warning("aiohttp is not installed, falling back to the thread pool engine")
+            results = self.run_threaded(books)
+        elif self.parse_processes > 0:
+            results = asyncio.run(self.run_pipeline(books))
+        else:
+            results = asyncio.run(self.run_async(books))
+        concurrency_controller.save()
+        # The books must be in the database before their pages may answer 304 on the next run
+        failed_urls = set(book_writer.flush(self.novel_source).values())
+        results['processed'] -= len(failed_urls)
+        results['error'] += len(failed_urls)
+        validator_cache.commit(url for url in self.completed_urls if url not in failed_urls)
+        return results
+
+    async def run_async(self, books):
+        results = {'processed': 0, 'skipped': 0, 'error': 0}
+        timeout = aiohttp.ClientTimeout(total=TOTAL_TIMEOUT, connect=CONNECT_TIMEOUT)
+        connector = aiohttp.TCPConnector(limit=0, ttl_dns_cache=300)
+
+        with ThreadPoolExecutor(max_workers=self.worker_threads) as executor:
+            async with aiohttp.ClientSession(connector=connector, timeout=timeout, headers={'Accept-Encoding': ACCEPT_ENCODING}) as session:
+                tasks = [
+                    asyncio.ensure_future(self.process_book(session, executor, title_url, idx + 1, len(books)))
+                    for idx, title_url in enumerate(books)
+                ]
+                for task in asyncio.as_completed(tasks):
+                    self.count_result(results, await task)
+        return results
+
+    async def run_pipeline(self, books):
+        results = {'processed': 0, 'skipped': 0, 'error': 0}
+        if not books:
+            return results
+        timeout = aiohttp.ClientTimeout(total=TOTAL_TIMEOUT, connect=CONNECT_TIMEOUT)
+        connector = aiohttp.TCPConnector(limit=0, ttl_dns_cache=300)
+
+        pending = asyncio.Queue()
+        for idx, title_url in enumerate(books):
+            pending.put_nowait((idx + 1, title_url))
+        pages = asyncio.Queue(maxsize=self.parse_processes * QUEUE_SIZE_PER_PROCESS)
+        parsed = asyncio.Queue(maxsize=self.parse_processes * QUEUE_SIZE_PER_PROCESS)
+
+        # Enough fetchers for the host limit to reach its maximum; acquire_slot holds them to the current one
+        fetchers = concurrency_controller.get_state(books[0][1], self.initial_limit, self.max_limit).max_limit
+        self.logger.info(f"Pipeline mode: {fetchers} fetchers, {self.parse_processes} parse processes, 1 writer")
+
+        # Spawned, not forked: this process already runs threads (other scrapers, their driver pools, the writer)
+        # and holds database connections, which a forked child would inherit in whatever state they were in
+        parse_context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=self.parse_processes, mp_context=parse_context) as parse_pool, ThreadPoolExecutor(max_workers=1) as writer:
+            async with aiohttp.ClientSession(connector=connector, timeout=timeout, headers={'Accept-Encoding': ACCEPT_ENCODING}) as session:
+                fetch_tasks = [asyncio.ensure_future(self.fetch_stage(session, pending, pages, results)) for _ in range(fetchers)]
+                parse_tasks = [asyncio.ensure_future(self.parse_stage(parse_pool, pages, parsed, results)) for _ in range(self.parse_processes)]
+                write_task = asyncio.ensure_future(self.write_stage(writer, parsed, results, len(books)))
+
+                # Each stage is told to stop once the one feeding it is done
+                await asyncio.gather(*fetch_tasks)
+                for _ in parse_tasks:
+                    await pages.put(None)
+                await asyncio.gather(*parse_tasks)
+                await parsed.put(None)
+                await write_task
+        return results
+
+    async def fetch_stage(self, session, pending, pages, results):
+        while True:
+            try:
+                book_number, title_url = pending.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            try:
+                page = await self.fetch(session, title_url[1])
+            except Exception as e:
+                self.logger.error(f"Error downloading {title_url}: {e}")
+                results['error'] += 1
+                continue
+            if page is None:
+                results['skipped'] += 1
+                continue
+            await pages.put((book_number, title_url, page))
+
+    async def parse_stage(self, parse_pool, pages, parsed, results):
+        loop = asyncio.get_running_loop()
+        scraper_ref = scraper_reference(type(self.scraper))
+        while True:
+            item = await pages.get()
+            if item is None:
+                return
+            book_number, title_url, (body, encoding) = item
+            try:
+                book = await loop.run_in_executor(parse_pool, parse_book_page, scraper_ref, title_url[1], body, encoding)
+            except Exception as e:
+                self.logger.error(f"Error parsing {title_url}: {e}")
+                results['error'] += 1
+                continue
+            await parsed.put((book_number, title_url, book))
+
+    async def write_stage(self, writer, parsed, results, total_books):
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await parsed.get()
+            if item is None:
+                return
+            book_number, title_url, book = item
+            try:
+                result = await loop.run_in_executor(writer, self.write_parsed, title_url, book_number, total_books, book)
+            except Exception as e:
+                self.logger.error(f"Error processing {title_url}: {e}")
+                results['error'] += 1
+                continue
+            self.track_completed(title_url, result)
+            self.count_result(results, result)
+
+    def write_parsed(self, title_url, book_number, total_books, book):
+        """
+        Runs in the writer thread: hands a book parsed by parse_book_page to the scraper.
+        """
+        return self.scraper.scrape_book_and_update_db(title_url, book_number, total_books, parsed=book)
+
+    async def process_book(self, session, executor, title_url, book_number, total_books):
+        try:
+            page = await self.fetch(session, title_url[1])
+            if page is None:
+                return {'status': 'skipped', 'title': title_url[0]}
+
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(executor, self.parse_and_update, title_url, book_number, total_books, page)
+            self.track_completed(title_url, result)
+            return result
+        except Exception as e:
+            self.logger.error(f"Error processing {title_url}: {e}")
+            return {'status': 'error', 'title': title_url[0], 'message': str(e)}
+
+    def parse_and_update(self, title_url, book_number, total_books, page):
+        """
+        Runs in the worker threads: parses the downloaded page and hands it to the scraper.
+        """
+        body, encoding = page
+        return self.scraper.scrape_book_and_update_db(title_url, book_number, total_books, soup=make_soup(body, encoding=encoding))
+
+    def process_book_blocking(self, title_url, book_number, total_books):
+        """
+        The thread pool counterpart of process_book.
+        """
+        soup = fetch_soup(title_url[1], conditional=True)
+        if soup is None:
+            return {'status': 'skipped', 'title': title_url[0]}
+        result = self.scraper.scrape_book_and_update_db(title_url, book_number, total_books, soup=soup)
+        self.track_completed(title_url, result)
+        return result
+
+    def track_completed(self, title_url, result):
+        # Only pages that were stored (or deliberately skipped) may be answered with a 304 next time
+        if result and result['status'] in ('processed', 'skipped'):
+            self.completed_urls.append(title_url[1])
+
+    async def acquire_slot(self, url):
+        """
+        Waits until the URL's host has fewer requests in flight than its current adaptive limit.
+
+        Returns:
+            bool: Whether the request uses up the host's whole limit (see AdaptiveLimit.saturated).
+        """
+        host = get_host(url)
+        if host not in self.host_gates:
+            # Created lazily so the conditions belong to the running event loop
+            self.host_gates[host] = asyncio.Condition()
+            self.in_flight[host] = 0
+        async with self.host_gates[host]:
+            await self.host_gates[host].wait_for(
+                lambda: self.in_flight[host] < concurrency_controller.get_limit(url, initial=self.initial_limit, max_limit=self.max_limit)
+            )
+            self.in_flight[host] += 1
+            return self.in_flight[host] >= concurrency_controller.get_limit(url)
+
+    async def release_slot(self, url):
+        host = get_host(url)
+        async with self.host_gates[host]:
+            self.in_flight[host] -= 1
+            self.host_gates[host].notify_all()
+
+    async def fetch(self, session, url):
+        """
+        Downloads a page, retrying connection errors and transient server errors with exponential backoff.
+        Each attempt holds one of the host's slots and reports its outcome to the concurrency controller.
+
+        Returns:
+            tuple: (body bytes, declared charset or None), or None if the page has not changed since it was last processed.
+
+        Raises:
+            aiohttp.ClientResponseError: If the server returned an error status.
+        """
+        for attempt in range(MAX_RETRIES + 1):
+            delay = BACKOFF_FACTOR * (2 ** attempt)
+            saturated = await self.acquire_slot(url)
+            started = time.monotonic()
+            try:
+                async with session.get(url, headers=validator_cache.conditional_headers(url)) as response:
+                    if response.status == 304:
+                        concurrency_controller.record(url, latency=time.monotonic() - started, status=response.status, saturated=saturated)
+                        return None
+                    if response.status in RETRY_STATUSES and attempt < MAX_RETRIES:
+                        retry_after = response.headers.get('Retry-After')
+                        if retry_after and retry_after.isdigit():
+                            delay = int(retry_after)
+                        concurrency_controller.record(url, status=response.status)
+                    else:
+                        response.raise_for_status()
+                        # Raw bytes: response.text() would run charset detection on every page without a declared charset
+                        body = await response.read()
+                        validator_cache.remember(url, response.headers)
+                        concurrency_controller.record(url, latency=time.monotonic() - started, status=response.status, saturated=saturated)
+                        return body, response.charset
+            except aiohttp.ClientResponseError as e:
+                concurrency_controller.record(url, status=e.status)
+                raise
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                concurrency_controller.record(url, exception=e)
+                if attempt == MAX_RETRIES:
+                    raise
+            finally:
+                await self.release_slot(url)
+            await asyncio.sleep(delay)
+
+    def run_threaded(self, books):
+        """
+        The previous engine: a thread pool of blocking requests. The pool is sized from the learned limit,
+        and http_client holds each request to the host's current limit.
+        """
+        results = {'processed': 0, 'skipped': 0, 'error': 0}
+        workers = concurrency_controller.suggest_workers(books[0][1], self.initial_limit, max_workers=self.max_limit) if books else 1
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            future_to_title = {
+                executor.submit(self.process_book_blocking, title_url, idx + 1, len(books)): title_url
+                for idx, title_url in enumerate(books)
+            }
+            for future in as_completed(future_to_title):
+                try:
+                    self.count_result(results, future.result())
+                except Exception as e:
+                    self.logger.error(f"Error processing {future_to_title[future]}: {e}")
+                    results['error'] += 1
+        return results
+
+    @staticmethod
+    def count_result(results, result):
+        if result['status'] == 'processed':
+            results['processed'] += 1
+        elif result['status'] == 'skipped':
+            results['skipped'] += 1
+        else:
+            results['error'] += 1
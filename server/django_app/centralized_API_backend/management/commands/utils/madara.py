@@ -0,0 +1,209 @@
+import logging
+import urllib.parse
+from requests.exceptions import RequestException
+from centralized_API_backend.management.commands.utils import http_client
+from centralized_API_backend.management.commands.utils.html_parsing import parse_response, LATEST_UPDATES
+from centralized_API_backend.management.commands.utils.dom_extraction import Field, extract
+
+# Statuses that mean plain requests are being refused (Cloudflare challenge, WAF...), not that one page failed
+BLOCKED_STATUSES = {401, 403, 503}
+
+# Safety net for listings whose last page keeps being served for any page number
+MAX_LISTING_PAGES = 500
+
+# Where current Madara versions serve a book's chapter list, relative to the book URL
+CHAPTERS_ENDPOINT = 'ajax/chapters/'
+
+# Older Madara versions serve it from admin-ajax.php, keyed by the book's WordPress post id
+ADMIN_AJAX_PATH = 'wp-admin/admin-ajax.php'
+POST_ID_SELECTORS = ['#manga-chapters-holder[data-id]', 'div[id^=manga-chaps][data-id]']
+
+# The info panel of a book page, read in the browser in one script call (see read_info_panel)
+INFO_PANEL_FIELDS = {
+    'synopsis': Field('.description-summary .summary__content', 'textContent'),
+    'authors': Field('.summary-content .author-content a', many=True),
+    'updated_on': Field('.chapter-release-date i'),
+    'newest_chapter': Field('.listing-chapters_wrap .wp-manga-chapter a'),
+    'genres': Field('.summary-content .genres-content a', many=True),
+    'image_url': Field('.summary_image img', 'src'),
+    'rating': Field('.post-total-rating .score'),
+    # The "Status", "Rank", "Type"... rows
+    'headings': Field('.post-content_item', many=True, fields={'heading': Field('.summary-heading h5'), 'content': Field('.summary-content')}),
+}
+
+def read_info_panel(driver, wait_for='.post-content_item', **fields):
+    """
+    Reads a book page's info panel in the browser with a single execute_script call.
+
+    Args:
+        driver (webdriver): A WebDriver on the book page.
+        wait_for (str): CSS selector of an element that shows the panel is loaded.
+        **fields: Fields to read on top of INFO_PANEL_FIELDS, or to replace some of them.
+
+    Returns:
+        dict: Field name to value (None when the element is missing). 'headings' is a dict of
+              heading ('Status', 'Rank'...) to the text next to it.
+    """
+    panel = extract(driver, {**INFO_PANEL_FIELDS, **fields}, wait_for=wait_for)
+    panel['headings'] = {row['heading']: row['content'] for row in panel['headings'] if row['heading']}
+    return panel
+
+class MadaraSite:
+    """
+    Plain HTTP access to a Madara (WordPress theme) source.
+
+    The Selenium scrapers get the full listing by clicking "Load more" (or "Older posts") and the full
+    chapter list of a book by clicking "Show more", sleeping a few seconds after every click. Both only
+    call the theme's own endpoints, which can be requested directly:
+        - the listing is paged at <listing>/page/N/,
+        - the chapter list comes from <book>/ajax/chapters/ (admin-ajax.php?action=manga_get_chapters on older versions).
+
+    Every method returns None when the endpoints cannot be used, and the scraper falls back to the browser.
+    Once a site refuses plain requests (BLOCKED_STATUSES), it is not asked again for the rest of the run.
+    """
+
+    def __init__(self, chapter_selector='ul.version-chap a', logger=None):
+        """
+        Args:
+            chapter_selector (str): CSS selector of the chapter links in the chapter list, as used by the scraper's browser code.
+            logger (logging.Logger, optional): The scraper's logger.
+        """
+        self.chapter_selector = chapter_selector
+        self.logger = logger or logging.getLogger(__name__)
+        self.blocked = False
+        self.legacy_chapters = False
+
+    def block(self, reason):
+        if not self.blocked:
+            self.logger.warning(f"Madara endpoints unavailable ({reason}). Falling back to the browser.")
+        self.blocked = True
+        return None
+
+    @staticmethod
+    def page_url(listing_url, page):
+        parts = urllib.parse.urlsplit(listing_url)
+        path = parts.path if parts.path.endswith('/') else parts.path + '/'
+        if page > 1:
+            path += f'page/{page}/'
+        return urllib.parse.urlunsplit((parts.scheme, parts.netloc, path, parts.query, ''))
+
+    def list_books(self, listing_url):
+        """
+        Reads every page of a listing.
+
+        Args:
+            listing_url (str): The listing, e.g. 'https://kalango.org/manga/'.
+
+        Returns:
+            list: (title, url) tuples in listing order, or None if the listing could not be read over HTTP.
+        """
+        if self.blocked:
+            return None
+
+        books, seen = [], set()
+        for page in range(1, MAX_LISTING_PAGES + 1):
+            url = self.page_url(listing_url, page)
+            try:
+                response = http_client.get(url)
+            except RequestException as e:
+                self.logger.warning(f"Error reading the listing page {url}: {e}")
+                return None
+            if response.status_code == 404 and page > 1:
+                # Past the last page
+                break
+            if response.status_code in BLOCKED_STATUSES:
+                return self.block(f"HTTP {response.status_code} on {url}")
+            if response.status_code != 200:
+                self.logger.warning(f"Unexpected HTTP {response.status_code} on the listing page {url}")
+                return None
+
+            new_books = []
+            for item in parse_response(response, parse_only=LATEST_UPDATES).select('.page-item-detail'):
+                link = item.select_one('.post-title a')
+                if link and link.get('href') and link['href'] not in seen:
+                    seen.add(link['href'])
+                    new_books.append((link.get_text().strip(), link['href']))
+            if not new_books:
+                break
+            books.extend(new_books)
+
+        if not books:
+            # An empty first page means the markup is not what we expect, not that the source has no books
+            self.logger.warning(f"No books found on {listing_url} over HTTP")
+            return None
+        return books
+
+    def fetch_chapters(self, book_url):
+        """
+        Downloads the full chapter list of a book.
+
+        Args:
+            book_url (str): The URL of the book's page.
+
+        Returns:
+            dict: Chapter title to chapter URL, newest first (as listed by the site),
+                  or None if the chapter list could not be read over HTTP.
+        """
+        if self.blocked:
+            return None
+        try:
+            if not self.legacy_chapters:
+                url = urllib.parse.urljoin(book_url.rstrip('/') + '/', CHAPTERS_ENDPOINT)
+                response = http_client.post(url, headers={'X-Requested-With': 'XMLHttpRequest'})
+                if response.status_code in (400, 404):
+                    self.logger.info("ajax/chapters/ is not available, using admin-ajax.php for the chapter lists")
+                    self.legacy_chapters = True
+                else:
+                    return self.read_chapters(response, book_url)
+
+            post_id = self.get_post_id(book_url)
+            if post_id is None:
+                return None
+            parts = urllib.parse.urlsplit(book_url)
+            url = urllib.parse.urlunsplit((parts.scheme, parts.netloc, '/' + ADMIN_AJAX_PATH, '', ''))
+            response = http_client.post(url, data={'action': 'manga_get_chapters', 'manga': post_id}, headers={'X-Requested-With': 'XMLHttpRequest'})
+            return self.read_chapters(response, book_url)
+        except RequestException as e:
+            self.logger.warning(f"Error fetching the chapter list of {book_url}: {e}")
+            return None
+
+    def read_chapters(self, response, book_url):
+        if response.status_code in BLOCKED_STATUSES:
+            return self.block(f"HTTP {response.status_code} on {response.url}")
+        if response.status_code != 200:
+            self.logger.warning(f"Unexpected HTTP {response.status_code} fetching the chapter list of {book_url}")
+            return None
+
+        chapters = {}
+        for link in parse_response(response).select(self.chapter_selector):
+            # Collapse whitespace the way the browser's element.text does, so chapter titles match the stored ones
+            chapter_title = ' '.join(link.get_text().split())
+            chapter_url = link.get('href')
+            if chapter_title and chapter_url and not chapter_url.startswith('javascript:'):
+                chapters[chapter_title] = chapter_url
+
+        if not chapters:
+            # Most likely a markup the selector does not match: let the browser have a look rather than store a book without chapters
+            self.logger.warning(f"No chapters found in the chapter list of {book_url} over HTTP")
+            return None
+        return chapters
+
+    def get_post_id(self, book_url):
+        """
+        Returns the WordPress post id of a book, read from its page, or None if it cannot be found.
+        """
+        response = http_client.get(book_url)
+        if response.status_code in BLOCKED_STATUSES:
+            return self.block(f"HTTP {response.status_code} on {book_url}")
+        if response.status_code != 200:
+            return None
+        soup = parse_response(response)
+        for selector in POST_ID_SELECTORS:
+            holder = soup.select_one(selector)
+            if holder:
+                return holder['data-id']
+        rating = soup.select_one('input.rating-post-id')
+        if rating and rating.get('value'):
+            return rating['value']
+        self.logger.warning(f"No post id found on {book_url}")
+        return None
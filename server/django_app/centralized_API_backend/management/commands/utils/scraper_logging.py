@@ -0,0 +1,50 @@
+import os
+import logging
+from logging.handlers import RotatingFileHandler
+
+LOG_FORMAT = "[%(levelname)s] %(asctime)s - %(message)s"
+LOG_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+def get_next_log_file_name(base_dir, base_filename):
+    counter = 0
+    while True:
+        log_file_name = f"{base_filename}_{counter}.txt" if counter else f"{base_filename}.txt"
+        full_path = os.path.join(base_dir, log_file_name)
+        if not os.path.exists(full_path):
+            return full_path
+        counter += 1
+
+def get_scraper_logger(source):
+    """
+    Returns the logger for a scraper, writing to its own rotating log file in ../out/<source>.
+
+    Unlike logging.basicConfig, this only attaches the file handler to the source's own logger,
+    so many scrapers can be imported into the same process (see scraper_registry) and still
+    each get their own log file. Messages also propagate to the root logger, which gets a
+    console handler if nothing else (e.g. master_scraper) has configured it yet.
+
+    Args:
+        source (str): The source name used for the log folder and logger (e.g. 'FlameComics').
+
+    Returns:
+        logging.Logger: The '<source>Scraper' logger.
+    """
+    root_logger = logging.getLogger()
+    if not root_logger.handlers:
+        logging.basicConfig(level=logging.INFO, format=LOG_FORMAT, datefmt=LOG_DATE_FORMAT, handlers=[logging.StreamHandler()])
+
+    # Suppressing unnessary Selenium Web Driver Manager logs
+    logging.getLogger('WDM').setLevel(logging.WARNING)
+
+    logger = logging.getLogger(f"{source}Scraper")
+    logger.setLevel(logging.INFO)
+    if not any(isinstance(handler, RotatingFileHandler) for handler in logger.handlers):
+        log_directory = f"../out/{source}"
+        os.makedirs(log_directory, exist_ok=True)
+
+        # 10MB per file, max 5 files of size 10 MB. The file is only created once something is logged.
+        file_handler = RotatingFileHandler(get_next_log_file_name(log_directory, f"scrape{source}"), maxBytes=10485760, backupCount=5, delay=True)
+        file_handler.setFormatter(logging.Formatter(LOG_FORMAT, datefmt=LOG_DATE_FORMAT))
+        logger.addHandler(file_handler)
+
+    return logger
@@ -0,0 +1,141 @@
+import os
+import sys
+import inspect
+import importlib.util
+import logging
+from dataclasses import dataclass
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class ScraperEntry:
+    """
+    A scraper discovered in the scraping_scripts folder.
+
+    Attributes:
+        script (str): The file name of the script (e.g. 'scrapeFlameComics.py').
+        scraper_class (type): The '*Scraper' class defined in the script (e.g. FlameComicsScraper).
+        entry_point (str): The name of the method that scrapes the whole source (e.g. 'scrape_flame_comics').
+    """
+    script: str
+    scraper_class: type
+    entry_point: str
+
+    def run(self):
+        """
+        Instantiates the scraper and scrapes the whole source.
+        """
+        scraper = self.scraper_class()
+        return getattr(scraper, self.entry_point)()
+
+def find_entry_point(scraper_class):
+    """
+    Finds the method that scrapes a whole source.
+
+    Every scraper exposes exactly one public 'scrape_*' method that takes no arguments
+    (scrape_flame_comics, scrape_light_novel_pub, ...). The other 'scrape_*' methods all
+    need a URL or a book, so we don't need each script to register its entry point by hand.
+
+    Args:
+        scraper_class (type): The scraper class to inspect.
+
+    Returns:
+        str: The name of the entry point, or None if there isn't exactly one candidate.
+    """
+    candidates = []
+    for name, member in inspect.getmembers(scraper_class, inspect.isfunction):
+        if not name.startswith('scrape_'):
+            continue
+        parameters = list(inspect.signature(member).parameters.values())[1:]
+        if all(p.default is not inspect.Parameter.empty or p.kind in (p.VAR_POSITIONAL, p.VAR_KEYWORD) for p in parameters):
+            candidates.append(name)
+    return candidates[0] if len(candidates) == 1 else None
+
+def load_module(module_name, path):
+    """
+    Imports a script under the given module name, once per process.
+
+    The module is registered in sys.modules before it runs, like a regular import, so the classes it
+    defines can be pickled by reference (e.g. to hand a scraper class to the parse processes of list_mode_engine).
+    """
+    module = sys.modules.get(module_name)
+    if module is not None:
+        return module
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        del sys.modules[module_name]
+        raise
+    return module
+
+def scraper_reference(scraper_class):
+    """
+    Returns what another process needs to find the scraper class again: (module name, script path, class name).
+
+    Sending the reference instead of the class works whether the script was loaded by load_scraper, imported
+    normally or run directly, and whether the other process was forked or spawned.
+    """
+    return scraper_class.__module__, inspect.getfile(scraper_class), scraper_class.__qualname__
+
+def resolve_scraper_reference(reference):
+    """
+    Returns the scraper class of a scraper_reference, importing its script if this process has not yet.
+    """
+    module_name, path, class_name = reference
+    return getattr(load_module(module_name, path), class_name)
+
+def load_scraper(scripts_folder, script):
+    """
+    Imports a scraping script as a module and returns its scraper.
+
+    The script is imported rather than executed, so its `if __name__ == "__main__"` block
+    does not run, and the heavy imports (selenium, bs4, bson, dateutil) and Django setup are
+    only paid once for the whole process.
+
+    Args:
+        scripts_folder (str): The folder containing the scraping scripts.
+        script (str): The file name of the script to import.
+
+    Returns:
+        ScraperEntry: The scraper defined in the script.
+
+    Raises:
+        ImportError: If the script does not define exactly one usable '*Scraper' class.
+    """
+    module_name = f"scraping_scripts.{os.path.splitext(script)[0]}"
+    module = load_module(module_name, os.path.join(scripts_folder, script))
+
+    scraper_classes = [
+        member for name, member in inspect.getmembers(module, inspect.isclass)
+        if name.endswith('Scraper') and member.__module__ == module_name
+    ]
+    if len(scraper_classes) != 1:
+        raise ImportError(f"Expected exactly one *Scraper class in {script}, found {len(scraper_classes)}")
+
+    entry_point = find_entry_point(scraper_classes[0])
+    if entry_point is None:
+        raise ImportError(f"Could not find the entry point of {scraper_classes[0].__name__} in {script}")
+
+    return ScraperEntry(script=script, scraper_class=scraper_classes[0], entry_point=entry_point)
+
+def load_scrapers(scripts_folder, scripts):
+    """
+    Imports every given scraping script once and returns the scrapers that loaded successfully.
+
+    Args:
+        scripts_folder (str): The folder containing the scraping scripts.
+        scripts (list): The file names of the scripts to import.
+
+    Returns:
+        list: A list of ScraperEntry, in the same order as `scripts`.
+    """
+    entries = []
+    for script in scripts:
+        try:
+            entries.append(load_scraper(scripts_folder, script))
+        except Exception as e:
+            logger.error(f"Could not load {script}: {e}")
+    return entries
@@ -0,0 +1,74 @@
+import os
+import json
+import sqlite3
+import datetime
+
+# Lives next to the scraper logs, so it survives between cron runs without touching the main database
+STATE_DB_PATH = os.environ.get("SCRAPER_STATE_DB", "../out/scraper_state.sqlite3")
+
+class StateStore:
+    """
+    A small persistent key-value store for state the scrapers learn between runs
+    (per-host concurrency limits, HTTP validators, crawl watermarks, ...).
+
+    Values are stored as JSON in a local SQLite file, grouped by namespace. SQLite handles
+    locking, so several scraper processes (master_scraper --parallel) can share the file.
+    A new connection is opened per operation, which keeps the store safe to use from any thread.
+    """
+
+    def __init__(self, namespace, path=None):
+        self.namespace = namespace
+        self.path = path or STATE_DB_PATH
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self.connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS scraper_state (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    updated_at TEXT NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                )
+            """)
+
+    def connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get(self, key, default=None):
+        with self.connect() as conn:
+            row = conn.execute("SELECT value FROM scraper_state WHERE namespace = ? AND key = ?", [self.namespace, key]).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def get_many(self, keys):
+        """
+        Returns a dict of the stored values for the given keys. Missing keys are left out.
+        """
+        keys = list(keys)
+        values = {}
+        with self.connect() as conn:
+            # Stay well under SQLite's limit on the number of bound parameters
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                rows = conn.execute(
+                    f"SELECT key, value FROM scraper_state WHERE namespace = ? AND key IN ({', '.join('?' for _ in chunk)})",
+                    [self.namespace, *chunk]
+                ).fetchall()
+                values.update((key, json.loads(value)) for key, value in rows)
+        return values
+
+    def set(self, key, value):
+        self.set_many({key: value})
+
+    def set_many(self, values):
+        now = datetime.datetime.now().isoformat()
+        with self.connect() as conn:
+            conn.executemany("""
+                INSERT INTO scraper_state (namespace, key, value, updated_at) VALUES (?, ?, ?, ?)
+                ON CONFLICT (namespace, key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at
+            """, [(self.namespace, key, json.dumps(value), now) for key, value in values.items()])
+
+    def delete(self, key):
+        with self.connect() as conn:
+            conn.execute("DELETE FROM scraper_state WHERE namespace = ? AND key = ?", [self.namespace, key])
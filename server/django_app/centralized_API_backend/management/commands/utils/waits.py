@@ -0,0 +1,121 @@
+import time
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+# Ceiling for every wait, in seconds: a page that has not reacted by then is not going to
+DEFAULT_TIMEOUT = 10
+
+# How often the conditions are checked, in seconds (WebDriverWait polls every 0.5s by default)
+POLL_FREQUENCY = 0.1
+
+# The page is loaded and has no AJAX request in flight (the Madara sources load more content through jQuery)
+NETWORK_IDLE_SCRIPT = """
+    return document.readyState === 'complete'
+        && (typeof window.jQuery === 'undefined' || window.jQuery.active === 0);
+"""
+
+# Whether the page's jQuery AJAX requests are all done: null when the page has no jQuery, so there is no way to tell
+AJAX_IDLE_SCRIPT = """
+    return typeof window.jQuery === 'undefined' ? null : window.jQuery.active === 0;
+"""
+
+# How long jQuery must report no request in flight before a "load more" wait gives up on new elements, in seconds.
+# Right after the click the request may not have started yet, so a single idle reading proves nothing.
+AJAX_QUIET_PERIOD = 0.5
+
+'''
+    Event-driven replacements for the fixed time.sleep(3) after clicking "Load more", "Show more" or
+    "Older posts". Each wait returns as soon as the page has reacted to the click, and gives up after
+    the timeout without raising, like the sleep it replaces.
+'''
+
+def count_elements(driver, by, value):
+    """
+    Returns the number of elements currently matching the locator.
+    """
+    return len(driver.find_elements(by, value))
+
+def network_idle(driver):
+    """
+    Returns True if the page is loaded and has no jQuery AJAX request in flight.
+    """
+    try:
+        return bool(driver.execute_script(NETWORK_IDLE_SCRIPT))
+    except WebDriverException:
+        return False
+
+def ajax_idle(driver):
+    """
+    Returns True if the page's jQuery has no AJAX request in flight, None if the page has no jQuery.
+    """
+    try:
+        return driver.execute_script(AJAX_IDLE_SCRIPT)
+    except WebDriverException:
+        return False
+
+class MoreElementsLoaded:
+    """
+    WebDriverWait condition for wait_for_more_elements: more elements than before, or jQuery idle for AJAX_QUIET_PERIOD.
+    """
+
+    def __init__(self, by, value, previous_count):
+        self.by = by
+        self.value = value
+        self.previous_count = previous_count
+        self.idle_since = None
+
+    def __call__(self, driver):
+        if count_elements(driver, self.by, self.value) > self.previous_count:
+            return True
+        if not ajax_idle(driver):
+            # A request is in flight, or the page has no jQuery: only new elements (or the timeout) end the wait
+            self.idle_since = None
+            return False
+        now = time.monotonic()
+        if self.idle_since is None:
+            self.idle_since = now
+        return now - self.idle_since >= AJAX_QUIET_PERIOD
+
+def wait_for_more_elements(driver, by, value, previous_count, timeout=DEFAULT_TIMEOUT):
+    """
+    Waits after a "load more" click until more elements match the locator than before the click,
+    or the jQuery request it started has finished without adding any (e.g. the last page).
+
+    On pages without jQuery there is no way to tell that the request finished, so the wait lasts until
+    new elements show up or the timeout, rather than stopping an infinite-scroll listing early.
+
+    Args:
+        driver (webdriver): The browser.
+        by (By): The Selenium By strategy of the loaded elements (listing entries, chapters).
+        value (str): The locator of the loaded elements.
+        previous_count (int): How many elements matched before the click (see count_elements).
+        timeout (int): Maximum time to wait, in seconds.
+
+    Returns:
+        int: The number of matching elements once the wait is over.
+    """
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=POLL_FREQUENCY).until(
+            MoreElementsLoaded(by, value, previous_count)
+        )
+    except TimeoutException:
+        pass
+    return count_elements(driver, by, value)
+
+def wait_for_page_change(driver, old_element, timeout=DEFAULT_TIMEOUT):
+    """
+    Waits after a click that navigates to another page until the old page is gone (old_element is
+    detached from the document) and the new one has finished loading.
+
+    Args:
+        driver (webdriver): The browser.
+        old_element (WebElement): Any element of the page that was clicked away from, e.g. the clicked link.
+        timeout (int): Maximum time to wait, in seconds.
+    """
+    try:
+        wait = WebDriverWait(driver, timeout, poll_frequency=POLL_FREQUENCY)
+        wait.until(EC.staleness_of(old_element))
+        wait.until(network_idle)
+    except TimeoutException:
+        pass
@@ -1,7 +1,7 @@
 from django.db import models
-import re
 import uuid
 from django.contrib.auth.models import User
+from .chapter_parser import latest_chapter
 
 class Genre(models.Model):
     name = models.CharField(max_length=150, unique=True)
@@ -43,6 +43,10 @@ class AllBooks(models.Model):
     novel_type = models.CharField(max_length=100)   # 'type' is a reserved keyword in Python
     followers = models.CharField(max_length=100)
     chapters = models.JSONField(default=dict)
+    # Summary of chapters, computed by the scrapers on write (see book_chapters.summarize_chapters)
+    newest_chapter_link = models.TextField(blank=True, null=True)
+    newest_chapter_sort_key = models.DecimalField(max_digits=20, decimal_places=5, blank=True, null=True)
+    chapter_count = models.IntegerField(blank=True, null=True)
     genres = models.ManyToManyField('Genre', through='AllBooksGenres', related_name='all_books')
 
     class Meta:
@@ -70,15 +74,33 @@ class AllBooks(models.Model):
         # Must be Light Novel Pub
         if not self.chapters:
             return None
-        def chapter_key(chapter_str):
-            numbers = re.findall(r"\d+\.\d+|\d+", chapter_str)
-            return [float(num) for num in numbers]
-        latest_chapter = max(self.chapters.keys(), key=chapter_key)
-        return latest_chapter
+        return latest_chapter(self.chapters)
 
     def get_chapter_link(self, chapter):
         return self.chapters.get(chapter, None)
 
+class BookChapter(models.Model):
+    # One row per chapter of a book (see book_chapters.py). all_books.chapters still holds the same data as JSON.
+    book_title = models.CharField(max_length=255)
+    book_novel_source = models.CharField(max_length=100)
+    chapter = models.TextField()
+    link = models.TextField(blank=True, null=True)
+    sort_key = models.DecimalField(max_digits=20, decimal_places=5, blank=True, null=True)
+    first_seen = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'book_chapters'
+        constraints = [
+            models.UniqueConstraint(fields=['book_title', 'book_novel_source', 'chapter'], name='unique_book_chapter')
+        ]
+        indexes = [
+            models.Index(fields=['book_title', 'book_novel_source', 'sort_key'])
+        ]
+        managed = False
+
+    def __str__(self):
+        return f"{self.book_title} ({self.book_novel_source}) - {self.chapter}"
+
 class AllBooksGenres(models.Model):
     # Django does not support composite primary keys, so we will manually manage the relationships.
     allbooks = models.ForeignKey(AllBooks, on_delete=models.CASCADE)
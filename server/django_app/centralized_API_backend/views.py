@@ -32,6 +32,8 @@ from django.db import transaction
 from django.core.validators import validate_email
 from django.core.exceptions import ValidationError
 from django.core.cache import cache
+from .book_chapters import get_latest_chapter
+from . import chapter_parser
 
 load_dotenv()  # Load environment variables from .env file
 logging.basicConfig(
@@ -134,19 +136,6 @@ def fetch_count(query, params=None):
     count = cursor.fetchone()[0]
     return count
 
-def get_newest_chapter_link(chapters):
-    max_chapter = -1
-    max_link = ""
-    for chapter_key, link in chapters.items():
-        try:
-            chapter_num = float(re.findall(r"[-+]?\d*\.\d+|\d+", chapter_key)[0])
-            if chapter_num > max_chapter:
-                max_chapter = chapter_num
-                max_link = link
-        except (ValueError, IndexError):
-            continue
-    return max_link
-
 def is_valid_book(book, image_url_required=False):
     """
     Validates all required fields of a book entry.
@@ -342,7 +331,6 @@ def get_home_books(is_logged_in=False):
     cache.set(cache_key, result, 86400)  # Cache for 1 day
     return result
 
-# TODO: Fix this!
 def parse_and_sort_chapters(chapters):
     # Check if chapters is a JSON string and parse it
     if isinstance(chapters, str):
@@ -355,9 +343,8 @@ def parse_and_sort_chapters(chapters):
     else:
         chapters_dict = chapters
 
-    # Sort chapters based on the first number found in the chapter key
-    sorted_chapters = {k: v for k, v in sorted(chapters_dict.items(), key=lambda item: int(re.findall(r'\d+', item[0])[0]) if re.findall(r'\d+', item[0]) else float('inf'))}
-    return sorted_chapters
+    # Sort chapters by (volume, chapter, part), see chapter_parser.py
+    return chapter_parser.sort_chapters(chapters_dict)
 
 @ensure_csrf_cookie
 @api_view(['GET'])
@@ -712,10 +699,11 @@ class UserProfileReadingListView(views.APIView):
                 cursor.execute("""
                     SELECT rl.id, rl.reading_status, rl.user_tag, rl.latest_read_chapter, 
                            ab.title AS book_title, ab.novel_source, ab.novel_type, ab.newest_chapter, 
-                           ab.chapters->>rl.latest_read_chapter AS latest_read_chapter_link, 
-                           ab.chapters AS chapters_json
+                           COALESCE(bc.link, ab.chapters->>rl.latest_read_chapter) AS latest_read_chapter_link, 
+                           ab.newest_chapter_link
                     FROM reading_list rl
                     JOIN all_books ab ON rl.book_title = ab.title AND rl.book_novel_source = ab.novel_source
+                    LEFT JOIN book_chapters bc ON bc.book_title = ab.title AND bc.book_novel_source = ab.novel_source AND bc.chapter = rl.latest_read_chapter
                     WHERE rl.profile_id = (
                         SELECT id FROM profile WHERE user_id = %s
                     )
@@ -725,19 +713,6 @@ class UserProfileReadingListView(views.APIView):
                 # Prepare the reading list response
                 reading_list = []
                 for row in reading_list_results:
-                    chapters_json = row[9]
-
-                    if isinstance(chapters_json, str):
-                        try:
-                            chapters_json = chapters_json.replace('\\"', '"')
-                            chapters_dict = json.loads(chapters_json)
-                        except json.JSONDecodeError:
-                            chapters_dict = {}
-                    else:
-                        chapters_dict = chapters_json
-
-                    newest_chapter_link = get_newest_chapter_link(chapters_dict)
-                    
                     reading_list.append({
                         'id': row[0],
                         'reading_status': row[1],
@@ -748,7 +723,7 @@ class UserProfileReadingListView(views.APIView):
                         'novel_type': row[6],
                         'newest_chapter': row[7],
                         'latest_read_chapter_link': row[8],
-                        'newest_chapter_link': newest_chapter_link
+                        'newest_chapter_link': row[9] or ''
                     })
 
             response = Response({'reading_list': reading_list})
@@ -827,25 +802,23 @@ def update_to_max_chapter(request):
                 return Response({'error': 'Profile not found'}, status=status.HTTP_404_NOT_FOUND)
             profile_id = profile_result[0]
 
-            # Fetch book details
-            cursor.execute("""
-                SELECT chapters, novel_source
-                FROM all_books
-                WHERE title = %s AND novel_source = %s
-            """, [title, novel_source])
-            result = cursor.fetchone()
-            if not result:
-                return Response({'error': 'Book not found in AllBooks'}, status=status.HTTP_404_NOT_FOUND)
-            chapters, novel_source = result
-            chapters = json.loads(chapters)
-
-            # Define chapter_key function to find latest chapter 
-            # TODO: might switch to using something similar to get_newest_chapter_link
-            def chapter_key(chapter_str):
-                numbers = re.findall(r"\d+\.\d+|\d+", chapter_str)
-                return [float(num) for num in numbers]
-            
-            latest_chapter = max(chapters.keys(), key=chapter_key) if chapters else None
+            # Latest chapter straight from the (book, sort_key) index of book_chapters
+            latest = get_latest_chapter(cursor, title, novel_source)
+            if latest:
+                latest_chapter = latest[0]
+            else:
+                # Books that have not been written to book_chapters yet
+                cursor.execute("""
+                    SELECT chapters, novel_source
+                    FROM all_books
+                    WHERE title = %s AND novel_source = %s
+                """, [title, novel_source])
+                result = cursor.fetchone()
+                if not result:
+                    return Response({'error': 'Book not found in AllBooks'}, status=status.HTTP_404_NOT_FOUND)
+                chapters, novel_source = result
+                chapters = json.loads(chapters)
+                latest_chapter = chapter_parser.latest_chapter(chapters)
 
             if latest_chapter:
                 # Update the latest read chapter in the reading list